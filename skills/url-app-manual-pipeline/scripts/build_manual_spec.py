@@ -8,6 +8,11 @@ from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import urlparse
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional faster JSON encoder
+    orjson = None
+
 
 LOCALE_TEXT = {
     "en": {
@@ -21,6 +26,21 @@ LOCALE_TEXT = {
         "controls": "Primary Controls",
         "caption_prefix": "Captured screen",
         "missing_note": "Some scenes were unavailable during capture and were degraded with fallback screenshots.",
+        "prereq_items": [
+            "A browser can access the target URL",
+            "Network and scripts are allowed for the page to render",
+            "Search keyword for demo flow: {query}",
+        ],
+        "flow_steps": [
+            "Open the home page and confirm primary regions are visible",
+            "Enter keyword '{query}' when search is available",
+            "Open one item to verify detail-level navigation",
+        ],
+        "maint_items": [
+            "Regenerate screenshots after major UI updates",
+            "Review table labels for domain-specific terminology",
+            "Re-run pipeline when capture manifest indicates degraded scenes",
+        ],
     },
     "zh-TW": {
         "title_suffix": "網站操作手冊",
@@ -33,6 +53,21 @@ LOCALE_TEXT = {
         "controls": "主要控制項",
         "caption_prefix": "畫面擷圖",
         "missing_note": "部分場景在擷取時不可用，已以替代截圖降級處理。",
+        "prereq_items": [
+            "瀏覽器可正常連線到目標網址",
+            "頁面允許必要腳本與網路請求",
+            "示範搜尋關鍵字：{query}",
+        ],
+        "flow_steps": [
+            "開啟首頁並確認主要區域可見",
+            "若有搜尋欄，輸入關鍵字「{query}」",
+            "點選一個項目以確認可進入明細頁",
+        ],
+        "maint_items": [
+            "重大 UI 變更後請重新擷取截圖",
+            "表格欄位文字請依領域術語校對",
+            "若 manifest 顯示降級場景，請重新執行流程",
+        ],
     },
 }
 
@@ -57,13 +92,10 @@ def with_scheme(url: str) -> str:
 def load_manifest(path: Path) -> dict:
     if not path.exists():
         return {"scenes": [], "capabilities": {}}
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def make_block(block_id: str, block_type: str, **kwargs) -> dict:
-    block = {"block_id": block_id, "type": block_type}
-    block.update(kwargs)
-    return block
+    data = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def apply_rewrite(spec: dict, locale: str) -> tuple[dict, bool]:
@@ -71,26 +103,30 @@ def apply_rewrite(spec: dict, locale: str) -> tuple[dict, bool]:
         suffix = "（系統自動整理）"
     else:
         suffix = " (auto-refined)"
+    add_period = locale == "en"
 
     for section in spec.get("sections", []):
         if section.get("level") == 1 and not section["title"].endswith(suffix):
             section["title"] = f"{section['title']}{suffix}"
+        if not add_period:
+            continue
         for block in section.get("blocks", []):
             if block.get("type") == "paragraph":
                 text = block.get("text", "")
-                if text and not text.endswith(".") and locale == "en":
+                if text and text[-1] != ".":
                     block["text"] = text + "."
     return spec, True
 
 
 def unique_ids(sections: list[dict]) -> None:
+    ids = [block["block_id"] for section in sections for block in section.get("blocks") or ()]
+    if len(ids) == len(set(ids)):
+        return
     seen = set()
-    for section in sections:
-        for block in section.get("blocks", []):
-            bid = block["block_id"]
-            if bid in seen:
-                raise ValueError(f"Duplicate block_id: {bid}")
-            seen.add(bid)
+    for bid in ids:
+        if bid in seen:
+            raise ValueError(f"Duplicate block_id: {bid}")
+        seen.add(bid)
 
 
 def main() -> int:
@@ -111,31 +147,20 @@ def main() -> int:
     title = f"{host} {text['title_suffix']}"
 
     scope_blocks = [
-        make_block("scope_intro", "paragraph", text=text["scope_intro"]),
-        make_block(
-            "scope_points",
-            "bullet_list",
-            items=[
+        {"block_id": "scope_intro", "type": "paragraph", "text": text["scope_intro"]},
+        {
+            "block_id": "scope_points",
+            "type": "bullet_list",
+            "items": [
                 f"Target URL: {url}",
                 "Desktop viewport focus (recommended >= 1280px)",
                 "UI can vary by login state, locale, and experiments",
             ],
-        ),
+        },
     ]
 
-    prereq_items = [
-        "A browser can access the target URL",
-        "Network and scripts are allowed for the page to render",
-        f"Search keyword for demo flow: {args.search_query}",
-    ]
-    if args.locale == "zh-TW":
-        prereq_items = [
-            "瀏覽器可正常連線到目標網址",
-            "頁面允許必要腳本與網路請求",
-            f"示範搜尋關鍵字：{args.search_query}",
-        ]
-
-    prereq_blocks = [make_block("prereq_points", "bullet_list", items=prereq_items)]
+    prereq_items = [item.format(query=args.search_query) for item in text["prereq_items"]]
+    prereq_blocks = [{"block_id": "prereq_points", "type": "bullet_list", "items": prereq_items}]
 
     table_rows: list[list[str]] = []
     if caps.get("has_top_nav"):
@@ -150,66 +175,44 @@ def main() -> int:
         table_rows.append(["Main Content", "Container", "Primary interactive area"])
 
     controls_blocks = [
-        make_block(
-            "controls_table",
-            "table",
-            table_id="primary_controls",
-            columns=["Control", "Type", "Function"],
-            rows=table_rows,
-        )
+        {
+            "block_id": "controls_table",
+            "type": "table",
+            "table_id": "primary_controls",
+            "columns": ["Control", "Type", "Function"],
+            "rows": table_rows,
+        }
     ]
 
-    figures = []
-    for i, scene in enumerate(scenes, start=1):
-        figure_id = scene.get("figure_id") or f"figure_{i:02d}"
-        caption = scene.get("caption") or f"{text['caption_prefix']} {i}: {scene.get('scene_type', 'scene')}"
-        figures.append(
-            make_block(
-                f"fig_block_{i:02d}",
-                "figure",
-                figure_id=figure_id,
-                caption=caption,
-                image_rel=scene.get("image_rel", ""),
-                anchor_section_id="flows",
-                order=i,
-            )
-        )
-
-    flow_steps = [
-        "Open the home page and confirm primary regions are visible",
-        f"Enter keyword '{args.search_query}' when search is available",
-        "Open one item to verify detail-level navigation",
+    cap_prefix = text["caption_prefix"]
+    figures = [
+        {
+            "block_id": f"fig_block_{i:02d}",
+            "type": "figure",
+            "figure_id": scene.get("figure_id") or f"figure_{i:02d}",
+            "caption": scene.get("caption") or f"{cap_prefix} {i}: {scene.get('scene_type', 'scene')}",
+            "image_rel": scene.get("image_rel", ""),
+            "anchor_section_id": "flows",
+            "order": i,
+        }
+        for i, scene in enumerate(scenes, start=1)
     ]
-    if args.locale == "zh-TW":
-        flow_steps = [
-            "開啟首頁並確認主要區域可見",
-            f"若有搜尋欄，輸入關鍵字「{args.search_query}」",
-            "點選一個項目以確認可進入明細頁",
-        ]
 
-    flow_blocks = [make_block("flow_steps", "numbered_list", items=flow_steps)] + figures
+    figure_count = len(figures)
 
-    maint_items = [
-        "Regenerate screenshots after major UI updates",
-        "Review table labels for domain-specific terminology",
-        "Re-run pipeline when capture manifest indicates degraded scenes",
-    ]
+    flow_steps = [step.format(query=args.search_query) for step in text["flow_steps"]]
+    flow_blocks = [{"block_id": "flow_steps", "type": "numbered_list", "items": flow_steps}] + figures
+
+    maint_items = list(text["maint_items"])
     if any(s.get("degraded") for s in scenes):
         maint_items.append(text["missing_note"])
 
-    if args.locale == "zh-TW":
-        maint_items = [
-            "重大 UI 變更後請重新擷取截圖",
-            "表格欄位文字請依領域術語校對",
-            "若 manifest 顯示降級場景，請重新執行流程",
-        ] + ([text["missing_note"]] if any(s.get("degraded") for s in scenes) else [])
-
-    maint_blocks = [make_block("maint_points", "bullet_list", items=maint_items)]
+    maint_blocks = [{"block_id": "maint_points", "type": "bullet_list", "items": maint_items}]
 
     build_cmd = "latexmk -pdf main.dynamic.tex"
     build_blocks = [
-        make_block("build_text", "paragraph", text="Run this in source directory:" if args.locale == "en" else "請在 source 目錄執行："),
-        make_block("build_cmd", "paragraph", text=build_cmd),
+        {"block_id": "build_text", "type": "paragraph", "text": "Run this in source directory:" if args.locale == "en" else "請在 source 目錄執行："},
+        {"block_id": "build_cmd", "type": "paragraph", "text": build_cmd},
     ]
 
     sections = [
@@ -229,15 +232,15 @@ def main() -> int:
             "level": 1,
             "order": 3,
             "blocks": [
-                make_block(
-                    "quick_notes_paragraph",
-                    "paragraph",
-                    text=(
+                {
+                    "block_id": "quick_notes_paragraph",
+                    "type": "paragraph",
+                    "text": (
                         "This section is dynamically inserted in PoC runs to validate paired-template flexibility"
                         if args.locale == "en"
                         else "此章節由 PoC 動態插入，用於驗證成對模板可變能力"
                     ),
-                )
+                }
             ],
         }
         sections.insert(2, extra)
@@ -277,10 +280,13 @@ def main() -> int:
             spec["trace"]["rules_used"].append("llm_rewrite_fallback_to_rules")
 
     args.out.parent.mkdir(parents=True, exist_ok=True)
-    args.out.write_text(json.dumps(spec, ensure_ascii=False, indent=2), encoding="utf-8")
+    if orjson is not None:
+        args.out.write_bytes(orjson.dumps(spec, option=orjson.OPT_INDENT_2))
+    else:
+        args.out.write_text(json.dumps(spec, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"spec: {args.out}")
     print(f"sections: {len(spec['sections'])}")
-    print(f"figures: {sum(1 for s in spec['sections'] for b in s['blocks'] if b['type'] == 'figure')}")
+    print(f"figures: {figure_count}")
     return 0
 
 
@@ -2,13 +2,110 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import base64
 import json
+import re
+import shutil
+import sys
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
-from urllib.parse import urljoin, urlparse
-
-from playwright.sync_api import sync_playwright
+from typing import Any, Sequence
+from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional faster JSON encoder
+    orjson = None
+
+
+# Resource types aborted during the search flow; they never show up in a still screenshot.
+HEAVY_RESOURCE_TYPES = frozenset({"media"})
+# Static assets served from the in-process cache once fetched by any page.
+CACHEABLE_RESOURCE_TYPES = frozenset({"script", "stylesheet", "image", "font"})
+# Dropped from replayed responses: the cached body is already decoded.
+UNCACHED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+# Third-party beacon hosts (and their subdomains); aborting them never changes a screenshot.
+ANALYTICS_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "connect.facebook.net",
+    "scorecardresearch.com",
+    "hotjar.com",
+    "segment.io",
+)
+# Matches the host part directly; every request is checked, so no urlparse per request.
+_ANALYTICS_URL_RE = re.compile(
+    r"^[a-z][a-z0-9+.-]*://(?:[^/?#@]*@)?(?:[^/?#:@]*\.)?(?:"
+    + "|".join(re.escape(host) for host in ANALYTICS_HOSTS)
+    + r")(?:[:/?#]|$)",
+    re.IGNORECASE,
+)
+SKIP_HREF_PREFIXES = ("#", "javascript:", "mailto:")
+OVERLAY_CANDIDATES = (
+    "button:has-text('Accept all')",
+    "button:has-text('I agree')",
+    "button:has-text('同意')",
+    "button:has-text('全部接受')",
+    "button[aria-label='Accept all']",
+)
+# Probed in priority order by first_visible_locator.
+SEARCH_SELECTORS = (
+    "input#search",
+    "input[name='search_query']",
+    "input[type='search']",
+    "input[name*='search' i]",
+    "input[placeholder*='search' i]",
+    "form[role='search'] input",
+    "input[type='text']",
+)
+TOP_NAV_SELECTORS = ("header", "[role='banner']", "nav")
+CONTENT_SELECTORS = ("main", "article", "[role='main']", "[class*='content' i]")
+SIDE_NAV_SELECTORS_STATIC = (
+    "aside nav",
+    "aside",
+    "ytd-mini-guide-renderer",
+    "ytd-guide-renderer",
+    "nav[aria-label*='navigation' i]",
+    "[role='navigation']",
+)
+SIDE_NAV_SELECTORS_DYN = ("aside nav", "aside", "[role='navigation']")
+CARD_SELECTORS_STATIC = (
+    "ytd-rich-item-renderer",
+    "ytd-video-renderer",
+    "a#thumbnail",
+    "article",
+    "[data-testid*='card' i]",
+    "[class*='card' i]",
+    "main a[href]",
+)
+CARD_SELECTORS_DYN = ("article", "[data-testid*='card' i]", "[class*='card' i]", "main a[href]")
+VIEWPORT = {"width": 1440, "height": 1024}
+JPEG_QUALITY = 85
+ACTION_TIMEOUT_MS = 3000
+NAVIGATION_TIMEOUT_MS = 90000
+COMMIT_TIMEOUT_MS = 15000
+NAV_READY_MS = 5000
+SCREENSHOT_TIMEOUT_MS = 30000
+PAGE_POOL_SIZE = 4
+READY_POLL_MS = 100
+READY_QUIET_MS = 300
+RESULTS_TIMEOUT_MS = 8000
+RESULTS_POLL_MAX_MS = 400
+# Nodes that typically make up a search result list.
+RESULT_SELECTOR = "[data-testid*='result' i], article, li, ytd-video-renderer"
+# Subsystems a headless screenshot run never uses.
+CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--no-default-browser-check",
+]
 
 
 def parse_args():
@@ -20,186 +117,447 @@ def parse_args():
     p.add_argument("--manifest-out", default=None, help="Output capture manifest path")
     p.add_argument("--max-shots", type=int, default=12)
     p.add_argument("--min-scenes", type=int, default=1)
+    p.add_argument("--user-data-dir", default=None, help="Persistent Chromium profile dir (keeps HTTP cache between runs)")
+    p.add_argument("--storage-state", default=None, help="Cookies/localStorage JSON loaded at start (if present); each capture merges its state back in")
+    p.add_argument("--urls-file", default=None, help="Capture every URL in this file (one per line) with one browser launch")
+    p.add_argument("--concurrency", type=int, default=2, help="URLs captured at once with --urls-file")
     return p.parse_args()
 
 
-def dismiss_overlays(page) -> None:
-    candidates = [
-        "button:has-text('Accept all')",
-        "button:has-text('I agree')",
-        "button:has-text('同意')",
-        "button:has-text('全部接受')",
-        "button[aria-label='Accept all']",
-    ]
-    for sel in candidates:
+class PagePool:
+    """Hands out fresh pages on one browser context, at most `size` open at a time.
+
+    Sharing the context keeps cookies, so an overlay dismissed on one page stays
+    dismissed on the others.
+    """
+
+    def __init__(self, context, size: int = PAGE_POOL_SIZE):
+        self.context = context
+        self._slots = asyncio.Semaphore(size)
+
+    @asynccontextmanager
+    async def page(self):
+        async with self._slots:
+            page = await self.context.new_page()
+            try:
+                yield page
+            finally:
+                await page.close()
+
+
+def cache_max_age(cache_control: str | None) -> int:
+    if not cache_control:
+        return 0
+    directives = [d.strip().lower() for d in cache_control.split(",")]
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+    for d in directives:
+        if d.startswith("max-age="):
+            try:
+                return int(d[len("max-age="):])
+            except ValueError:
+                return 0
+    return 0
+
+
+class ResponseCache:
+    """In-memory cache of GET static assets, shared by every page on the context.
+
+    Responses are kept for their Cache-Control max-age. Concurrent requests for the
+    same URL (the pool loads the home page on several pages at once) wait for the
+    first fetch instead of going to the network again. URLs whose response was not
+    cacheable are passed straight through from then on.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, int, dict[str, str], bytes]] = {}
+        self._pending: dict[str, asyncio.Future] = {}
+        self._uncacheable: set[str] = set()
+
+    async def handle(self, route) -> None:
+        request = route.request
+        if request.method != "GET" or request.resource_type not in CACHEABLE_RESOURCE_TYPES:
+            await route.continue_()
+            return
+        url = request.url
+        loop = asyncio.get_running_loop()
+        while True:
+            if url in self._uncacheable:
+                await route.continue_()
+                return
+            entry = self._entries.get(url)
+            if entry is not None and entry[0] > loop.time():
+                _, status, headers, body = entry
+                await route.fulfill(status=status, headers=headers, body=body)
+                return
+            pending = self._pending.get(url)
+            if pending is None:
+                break
+            await asyncio.shield(pending)
+
+        self._pending[url] = loop.create_future()
+        try:
+            try:
+                response = await route.fetch()
+            except Exception:
+                await route.continue_()
+                return
+            max_age = cache_max_age(response.headers.get("cache-control"))
+            if response.status == 200 and max_age > 0:
+                # Only bodies that will be replayed are copied into Python.
+                try:
+                    body = await response.body()
+                except Exception:
+                    body = None
+                if body is not None:
+                    headers = {k: v for k, v in response.headers.items() if k.lower() not in UNCACHED_HEADERS}
+                    self._entries[url] = (loop.time() + max_age, response.status, headers, body)
+            else:
+                self._uncacheable.add(url)
+            await route.fulfill(response=response)
+        finally:
+            self._pending.pop(url).set_result(None)
+
+
+async def dismiss_overlays(page) -> None:
+    for sel in OVERLAY_CANDIDATES:
         try:
             loc = page.locator(sel).first
-            if loc.is_visible(timeout=1000):
-                loc.click(timeout=1500)
-                page.wait_for_timeout(1000)
+            if await loc.is_visible():
+                await loc.click(timeout=1500)
+                await wait_for_ready(page, 1000)
                 return
         except Exception:
             continue
 
 
-def goto_home(page, base_url: str) -> None:
-    page.goto(base_url, wait_until="domcontentloaded", timeout=90000)
-    dismiss_overlays(page)
-    page.wait_for_timeout(2000)
+async def navigate(page, url: str, ready_ms: int = NAV_READY_MS) -> None:
+    # A server that is slow to answer at all gets one retry under the full navigation
+    # timeout. DOMContentLoaded is always awaited before the ready poll, so a capped
+    # poll can never hand back a blank or half-parsed page.
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    try:
+        await page.goto(url, wait_until="commit", timeout=COMMIT_TIMEOUT_MS)
+    except PlaywrightTimeoutError:
+        await page.goto(url, wait_until="domcontentloaded")
+    await page.wait_for_load_state("domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+    await wait_for_ready(page, ready_ms)
+
+
+async def goto_home(page, base_url: str) -> None:
+    await navigate(page, base_url)
+    await dismiss_overlays(page)
+
+
+async def wait_for_ready(page, timeout_ms: int = 10000, quiet_ms: int = READY_QUIET_MS) -> None:
+    # Return once document.readyState is "complete" and no request has started or ended
+    # for quiet_ms, or after timeout_ms at the latest. Unlike networkidle this also
+    # settles after in-page (SPA) updates, which never fire a new load event.
+    loop = asyncio.get_running_loop()
+    # Only requests seen starting here are tracked, so one that began before polling
+    # cannot cancel out a new one when it finishes.
+    inflight: set = set()
+    last_activity = loop.time()
+
+    def on_request(request) -> None:
+        nonlocal last_activity
+        inflight.add(request)
+        last_activity = loop.time()
+
+    def on_request_done(request) -> None:
+        nonlocal last_activity
+        inflight.discard(request)
+        last_activity = loop.time()
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_request_done)
+    page.on("requestfailed", on_request_done)
+    deadline = loop.time() + timeout_ms / 1000
+    try:
+        while True:
+            try:
+                state = await page.evaluate("document.readyState")
+            except Exception:
+                state = None  # context torn down by a navigation; poll again
+            now = loop.time()
+            if state == "complete" and not inflight and now - last_activity >= quiet_ms / 1000:
+                return
+            if now >= deadline:
+                return
+            await asyncio.sleep(READY_POLL_MS / 1000)
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("requestfinished", on_request_done)
+        page.remove_listener("requestfailed", on_request_done)
 
 
-def screenshot_safe(target: Any, path: Path, full_page: bool = False, fallback_page: Any | None = None) -> bool:
-    path.parent.mkdir(parents=True, exist_ok=True)
+async def count_results(page) -> int:
     try:
-        if full_page:
-            target.screenshot(path=str(path), full_page=True)
-        else:
-            target.screenshot(path=str(path))
+        return await page.evaluate("sel => document.querySelectorAll(sel).length", RESULT_SELECTOR) or 0
+    except Exception:
+        return 0  # context torn down by the results navigation
+
+
+async def await_results(page, baseline: int, start_url: str, timeout_ms: int = RESULTS_TIMEOUT_MS) -> None:
+    # Poll with backoff (100, 200, then 400 ms) until more result-like nodes exist than
+    # before submit, or a new page has any, instead of sleeping a fixed time. The node
+    # count only says the results have started (nav menus match too), so the page is
+    # then left to settle before the caller takes its screenshot.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    delay = READY_POLL_MS / 1000
+    while True:
+        count = await count_results(page)
+        if count > baseline or (count and page.url != start_url):
+            break
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, RESULTS_POLL_MAX_MS / 1000)
+    await wait_for_ready(page, NAV_READY_MS)
+
+
+async def _route_skip_heavy(route) -> None:
+    if route.request.resource_type in HEAVY_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.fallback()
+
+
+async def block_heavy_assets(page) -> None:
+    await page.route("**/*", _route_skip_heavy)
+
+
+def is_analytics_url(url: str) -> bool:
+    return _ANALYTICS_URL_RE.match(url) is not None
+
+
+async def _route_skip_analytics(route) -> None:
+    if is_analytics_url(route.request.url):
+        await route.abort()
+    else:
+        await route.fallback()
+
+
+_ensured_dirs: set[Path] = set()
+
+
+def ensure_dir(path: Path) -> None:
+    # Every shot lands in one of a handful of dirs; mkdir each only once per process.
+    if path not in _ensured_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(path)
+
+
+async def screenshot_safe(target: Any, path: Path, full_page: bool = False, fallback_page: Any | None = None) -> bool:
+    ensure_dir(path.parent)
+    # Screenshots keep Playwright's stock budget; the short context default targets clicks and waits.
+    opts: dict[str, Any] = {"path": str(path), "timeout": SCREENSHOT_TIMEOUT_MS}
+    if full_page:
+        opts["full_page"] = True
+    if path.suffix.lower() in (".jpg", ".jpeg"):
+        opts["type"] = "jpeg"
+        opts["quality"] = JPEG_QUALITY
+    try:
+        await target.screenshot(**opts)
         return False
     except Exception:
         if fallback_page is None:
             raise
-        if full_page:
-            fallback_page.screenshot(path=str(path), full_page=True)
-        else:
-            fallback_page.screenshot(path=str(path))
+        await fallback_page.screenshot(**opts)
         return True
 
 
-def first_visible_locator(page, selectors: list[str], max_each: int = 10):
-    for sel in selectors:
-        loc = page.locator(sel)
+async def open_cdp_session(page):
+    try:
+        return await page.context.new_cdp_session(page)
+    except Exception:
+        return None  # CDP is Chromium-only
+
+
+async def crop_safe(page, cdp, target: Any, path: Path) -> bool:
+    # JPEG element crops go straight to Page.captureScreenshot with a clip, skipping the
+    # actionability and stability waits of a locator screenshot. Anything CDP cannot
+    # handle falls back to the Playwright element screenshot.
+    if cdp is not None and path.suffix.lower() in (".jpg", ".jpeg"):
         try:
-            count = min(loc.count(), max_each)
+            box = await target.bounding_box()
+            if box and box["width"] > 0 and box["height"] > 0:
+                viewport = (await cdp.send("Page.getLayoutMetrics"))["cssLayoutViewport"]
+                shot = await cdp.send(
+                    "Page.captureScreenshot",
+                    {
+                        "format": "jpeg",
+                        "quality": JPEG_QUALITY,
+                        "captureBeyondViewport": True,
+                        "clip": {
+                            "x": box["x"] + viewport["pageX"],
+                            "y": box["y"] + viewport["pageY"],
+                            "width": box["width"],
+                            "height": box["height"],
+                            "scale": 1,
+                        },
+                    },
+                )
+                ensure_dir(path.parent)
+                path.write_bytes(base64.b64decode(shot["data"]))
+                return False
         except Exception:
-            continue
-        for i in range(count):
-            candidate = loc.nth(i)
-            try:
-                if candidate.is_visible(timeout=800):
-                    return candidate
-            except Exception:
-                continue
-    return None
+            pass
+    return await screenshot_safe(target, path, fallback_page=page)
+
+
+async def full_page_safe(page, cdp, path: Path) -> bool:
+    # One Page.captureScreenshot over the whole content size renders the page off-screen
+    # in a single pass; without CDP this is the Playwright full_page screenshot.
+    if cdp is not None:
+        try:
+            content = (await cdp.send("Page.getLayoutMetrics"))["cssContentSize"]
+            if content["width"] > 0 and content["height"] > 0:
+                shot = await cdp.send(
+                    "Page.captureScreenshot",
+                    {
+                        "format": "png",
+                        "captureBeyondViewport": True,
+                        "clip": {"x": 0, "y": 0, "width": content["width"], "height": content["height"], "scale": 1},
+                    },
+                )
+                ensure_dir(path.parent)
+                path.write_bytes(base64.b64decode(shot["data"]))
+                return False
+        except Exception:
+            pass
+    return await screenshot_safe(page, path, full_page=True)
 
 
-def first_detail_url(page, base_url: str) -> str | None:
-    base = urlparse(base_url)
-    anchors = page.locator("main a[href], article a[href], a[href]")
-    count = min(anchors.count(), 40)
-    for i in range(count):
+async def first_visible_locator(page, selectors: Sequence[str]):
+    # Playwright resolves the visibility filter itself, so matches inside open shadow
+    # roots count and the returned locator is exactly the element that was checked.
+    for sel in selectors:
+        loc = page.locator(f"{sel} >> visible=true").first
         try:
-            href = anchors.nth(i).get_attribute("href")
-            if not href:
-                continue
-            href = href.strip()
-            if not href or href.startswith("#") or href.startswith("javascript:") or href.startswith("mailto:"):
-                continue
-            dest = urljoin(base_url, href)
-            parsed = urlparse(dest)
-            if parsed.netloc and parsed.netloc != base.netloc:
-                continue
-            if parsed.path in ("", "/"):
-                continue
-            return dest
+            if await loc.count():
+                return loc
         except Exception:
             continue
     return None
 
 
+async def first_detail_url(page, base_url: str) -> str | None:
+    # Resolve and filter the candidate links in the page, so the whole probe is one round-trip.
+    try:
+        return await page.evaluate(
+            """([sel, limit, base, skip]) => {
+                const baseHost = new URL(base).host;
+                for (const a of Array.from(document.querySelectorAll(sel)).slice(0, limit)) {
+                    const href = (a.getAttribute("href") || "").trim();
+                    if (!href || skip.some((p) => href.startsWith(p))) continue;
+                    let dest;
+                    try {
+                        dest = new URL(href, base);
+                    } catch (e) {
+                        continue;
+                    }
+                    if (dest.host && dest.host !== baseHost) continue;
+                    if (dest.pathname === "" || dest.pathname === "/") continue;
+                    return dest.href;
+                }
+                return null;
+            }""",
+            ["main a[href], article a[href], a[href]", 40, base_url, list(SKIP_HREF_PREFIXES)],
+        )
+    except Exception:
+        return None
+
+
 def manifest_path(args, outdir: Path) -> Path:
     if args.manifest_out:
         return Path(args.manifest_out)
     return outdir.parent / "capture_manifest.json"
 
 
-def capture_static(page, base_url: str, outdir: Path, search_query: str) -> tuple[list[str], dict]:
-    goto_home(page, base_url)
-    screenshot_safe(page, outdir / "home-overview.png", full_page=True)
+async def capture_static(pool: PagePool, base_url: str, outdir: Path, search_query: str) -> tuple[list[str], dict]:
+    # Home crops, the search flow and the detail page run on separate pages concurrently.
+
+    async def open_item_result(url: str) -> None:
+        async with pool.page() as page:
+            await navigate(page, url)
+            await screenshot_safe(page, outdir / "flow-open-video-step2.png")
+
+    async def home_scenes() -> tuple[str | None, dict]:
+        async with pool.page() as page:
+            await goto_home(page, base_url)
+            cdp = await open_cdp_session(page)
+            await full_page_safe(page, cdp, outdir / "home-overview.png")
+            # The open-item flow starts from this same home view.
+            first_watch = await first_detail_url(page, base_url)
+            await screenshot_safe(page, outdir / "flow-open-video-step1.png")
+            detail = asyncio.create_task(open_item_result(first_watch)) if first_watch else None
+
+            # Static crop names stay .png: main.template.tex, the pipeline's required list
+            # and any reused workspace main.tex refer to them, so crop_safe skips CDP here.
+            top_nav = await first_visible_locator(page, TOP_NAV_SELECTORS)
+            if top_nav is not None:
+                await crop_safe(page, cdp, top_nav, outdir / "top-nav.png")
+            else:
+                await screenshot_safe(page, outdir / "top-nav.png")
+
+            side_nav = await first_visible_locator(page, SIDE_NAV_SELECTORS_STATIC)
+            if side_nav is not None:
+                await crop_safe(page, cdp, side_nav, outdir / "left-nav.png")
+            else:
+                await screenshot_safe(page, outdir / "left-nav.png")
+
+            card = await first_visible_locator(page, CARD_SELECTORS_STATIC)
+            if card is None:
+                await screenshot_safe(page, outdir / "video-card.png")
+            else:
+                try:
+                    await card.scroll_into_view_if_needed(timeout=5000)
+                    await card.wait_for(state="visible")
+                except Exception:
+                    pass
+                await crop_safe(page, cdp, card, outdir / "video-card.png")
+
+            if detail is not None:
+                await detail
+            elif (outdir / "flow-open-video-step1.png").exists():
+                shutil.copyfile(outdir / "flow-open-video-step1.png", outdir / "flow-open-video-step2.png")
+            else:
+                await screenshot_safe(page, outdir / "flow-open-video-step2.png")
+
+        caps = {
+            "has_top_nav": top_nav is not None,
+            "has_side_nav": side_nav is not None,
+            "has_card": card is not None,
+        }
+        return first_watch, caps
+
+    async def search_scenes() -> bool:
+        async with pool.page() as page:
+            await block_heavy_assets(page)
+            await goto_home(page, base_url)
+            search_input = await first_visible_locator(page, SEARCH_SELECTORS)
 
-    top_nav = first_visible_locator(page, ["header", "[role='banner']", "nav"])
-    if top_nav is not None:
-        screenshot_safe(top_nav, outdir / "top-nav.png", fallback_page=page)
-    else:
-        screenshot_safe(page, outdir / "top-nav.png")
-
-    side_nav = first_visible_locator(
-        page,
-        [
-            "aside nav",
-            "aside",
-            "ytd-mini-guide-renderer",
-            "ytd-guide-renderer",
-            "nav[aria-label*='navigation' i]",
-            "[role='navigation']",
-        ],
-    )
-    if side_nav is not None:
-        screenshot_safe(side_nav, outdir / "left-nav.png", fallback_page=page)
-    else:
-        screenshot_safe(page, outdir / "left-nav.png")
-
-    card = first_visible_locator(
-        page,
-        [
-            "ytd-rich-item-renderer",
-            "ytd-video-renderer",
-            "a#thumbnail",
-            "article",
-            "[data-testid*='card' i]",
-            "[class*='card' i]",
-            "main a[href]",
-        ],
-    )
-    if card is None:
-        screenshot_safe(page, outdir / "video-card.png")
-    else:
-        try:
-            card.scroll_into_view_if_needed(timeout=5000)
-            page.wait_for_timeout(500)
-        except Exception:
-            pass
-        screenshot_safe(card, outdir / "video-card.png", fallback_page=page)
-
-    search_input = first_visible_locator(
-        page,
-        [
-            "input#search",
-            "input[name='search_query']",
-            "input[type='search']",
-            "input[name*='search' i]",
-            "input[placeholder*='search' i]",
-            "form[role='search'] input",
-            "input[type='text']",
-        ],
-    )
-
-    has_search = search_input is not None
-    try:
-        if search_input is None:
-            raise RuntimeError("search input not found")
-        search_input.click(timeout=3000)
-        search_input.fill(search_query)
-        page.wait_for_timeout(500)
-        screenshot_safe(page, outdir / "flow-search-step1.png")
-        page.keyboard.press("Enter")
-        page.wait_for_load_state("domcontentloaded", timeout=60000)
-        page.wait_for_timeout(2500)
-        screenshot_safe(page, outdir / "flow-search-step2.png")
-    except Exception:
-        screenshot_safe(page, outdir / "flow-search-step1.png")
-        screenshot_safe(page, outdir / "flow-search-step2.png")
-
-    goto_home(page, base_url)
-    first_watch = first_detail_url(page, base_url)
-    screenshot_safe(page, outdir / "flow-open-video-step1.png")
+            try:
+                if search_input is None:
+                    raise RuntimeError("search input not found")
+                await search_input.click()
+                await search_input.fill(search_query)
+                await wait_for_ready(page, 500)
+                await screenshot_safe(page, outdir / "flow-search-step1.png")
+                baseline, start_url = await count_results(page), page.url
+                await page.keyboard.press("Enter")
+                await await_results(page, baseline, start_url)
+                await screenshot_safe(page, outdir / "flow-search-step2.png")
+            except Exception:
+                await screenshot_safe(page, outdir / "flow-search-step1.png")
+                await screenshot_safe(page, outdir / "flow-search-step2.png")
+        return search_input is not None
 
-    if first_watch:
-        page.goto(first_watch, wait_until="domcontentloaded", timeout=90000)
-        page.wait_for_timeout(3000)
-        screenshot_safe(page, outdir / "flow-open-video-step2.png")
-    else:
-        screenshot_safe(page, outdir / "flow-open-video-step2.png")
+    (first_watch, home_caps), has_search = await asyncio.gather(home_scenes(), search_scenes())
 
     saved = [
         "home-overview.png",
@@ -223,183 +581,299 @@ def capture_static(page, base_url: str, outdir: Path, search_query: str) -> tupl
         {"figure_id": "flow_open_result", "scene_type": "task_result", "file": "flow-open-video-step2.png", "image_rel": "images/flow-open-video-step2.png", "source_url": first_watch or base_url, "confidence": 0.8, "degraded": first_watch is None},
     ]
 
-    capabilities = {
-        "has_search_input": has_search,
-        "has_top_nav": top_nav is not None,
-        "has_side_nav": side_nav is not None,
-        "has_card": card is not None,
-    }
+    capabilities = {"has_search_input": has_search, **home_caps}
 
     return saved, {"scenes": scenes, "capabilities": capabilities}
 
 
-def capture_dynamic(page, base_url: str, outdir: Path, search_query: str, max_shots: int, min_scenes: int) -> dict:
-    scene_rows: list[dict] = []
-
-    def add_scene(figure_id: str, scene_type: str, path_name: str, degraded: bool, confidence: float, source_url: str, caption: str) -> None:
-        scene_rows.append(
-            {
-                "figure_id": figure_id,
-                "scene_type": scene_type,
-                "file": path_name,
-                "image_rel": f"images/{path_name}",
-                "source_url": source_url,
-                "confidence": confidence,
-                "degraded": degraded,
-                "caption": caption,
-            }
-        )
+def add_scene(rows: list[dict], figure_id: str, scene_type: str, path_name: str, degraded: bool, confidence: float, source_url: str, caption: str) -> None:
+    rows.append(
+        {
+            "figure_id": figure_id,
+            "scene_type": scene_type,
+            "file": path_name,
+            "image_rel": f"images/{path_name}",
+            "source_url": source_url,
+            "confidence": confidence,
+            "degraded": degraded,
+            "caption": caption,
+        }
+    )
+
 
-    goto_home(page, base_url)
+async def capture_dynamic(pool: PagePool, base_url: str, outdir: Path, search_query: str, max_shots: int, min_scenes: int) -> dict:
+    # Home scenes and the search flow run on separate pages concurrently; rows are
+    # collected per task and joined in the usual scene order at the end.
+    required_rows: list[dict] = []
+    task_rows: list[dict] = []
+    optional_rows: list[dict] = []
+    detail_rows: list[dict] = []
+    fallback_rows: list[dict] = []
+
+    async def detail_scene(url: str) -> None:
+        async with pool.page() as page:
+            try:
+                await navigate(page, url)
+            except Exception:
+                return
+            degraded = await screenshot_safe(page, outdir / "detail-page.jpg")
+            add_scene(detail_rows, "detail_page", "detail_page", "detail-page.jpg", degraded, 0.72 if not degraded else 0.4, page.url, "Detail page")
+
+    async def home_scenes() -> dict:
+        async with pool.page() as page:
+            await goto_home(page, base_url)
+            cdp = await open_cdp_session(page)
+
+            # 1) Required minimal scenes
+            degraded = await full_page_safe(page, cdp, outdir / "home-overview.png")
+            add_scene(required_rows, "home_overview", "home_overview", "home-overview.png", degraded, 0.95 if not degraded else 0.5, base_url, "Home overview")
+
+            top_nav = await first_visible_locator(page, TOP_NAV_SELECTORS)
+            if top_nav is not None:
+                degraded = await crop_safe(page, cdp, top_nav, outdir / "primary-nav.jpg")
+            else:
+                degraded = await screenshot_safe(page, outdir / "primary-nav.jpg")
+                degraded = True
+            add_scene(required_rows, "primary_nav", "primary_nav", "primary-nav.jpg", degraded, 0.85 if not degraded else 0.45, base_url, "Primary navigation")
+
+            content = await first_visible_locator(page, CONTENT_SELECTORS)
+            if content is not None:
+                degraded = await crop_safe(page, cdp, content, outdir / "primary-content.jpg")
+            else:
+                degraded = await screenshot_safe(page, outdir / "primary-content.jpg")
+                degraded = True
+            add_scene(required_rows, "primary_content", "primary_content", "primary-content.jpg", degraded, 0.82 if not degraded else 0.4, base_url, "Primary content area")
+
+            # 2) Optional scenes up to max_shots; the two task scenes are always recorded.
+            optional_slots = max_shots - len(required_rows) - 2
+
+            side_nav = await first_visible_locator(page, SIDE_NAV_SELECTORS_DYN)
+            card = await first_visible_locator(page, CARD_SELECTORS_DYN)
+            detail = await first_detail_url(page, base_url)
+
+            home_specs = []
+            if side_nav is not None:
+                home_specs.append(("side_navigation", "side_navigation", "side-navigation.jpg", side_nav, "Side navigation"))
+            if card is not None:
+                home_specs.append(("content_card", "content_card", "content-card.jpg", card, "Representative content card"))
+            home_specs = home_specs[: max(0, optional_slots)]
+
+            detail_task = None
+            if detail and optional_slots > len(home_specs):
+                detail_task = asyncio.create_task(detail_scene(detail))
+
+            for figure_id, scene_type, file_name, target, caption in home_specs:
+                degraded = await crop_safe(page, cdp, target, outdir / file_name)
+                add_scene(optional_rows, figure_id, scene_type, file_name, degraded, 0.72 if not degraded else 0.4, page.url, caption)
+
+            if detail_task is not None:
+                await detail_task
+
+            # Ensure min scenes requirement.
+            if len(required_rows) + 2 + len(optional_rows) + len(detail_rows) < max(1, min_scenes):
+                degraded = await screenshot_safe(page, outdir / "fallback-scene.jpg")
+                add_scene(fallback_rows, "fallback_scene", "fallback", "fallback-scene.jpg", True or degraded, 0.2, page.url, "Fallback scene")
+
+        return {
+            "has_top_nav": top_nav is not None,
+            "has_side_nav": side_nav is not None,
+            "has_card": card is not None,
+        }
+
+    async def search_scenes() -> bool:
+        async with pool.page() as page:
+            await block_heavy_assets(page)
+            await goto_home(page, base_url)
+            search_input = await first_visible_locator(page, SEARCH_SELECTORS)
+
+            if search_input is not None:
+                try:
+                    await search_input.click()
+                    await search_input.fill(search_query)
+                    await wait_for_ready(page, 500)
+                    degraded = await screenshot_safe(page, outdir / "task-entry.jpg")
+                    add_scene(task_rows, "task_entry", "task_entry", "task-entry.jpg", degraded, 0.8 if not degraded else 0.45, base_url, "Task entry")
+                    baseline, start_url = await count_results(page), page.url
+                    await page.keyboard.press("Enter")
+                    await await_results(page, baseline, start_url)
+                    degraded = await screenshot_safe(page, outdir / "task-result.jpg")
+                    add_scene(task_rows, "task_result", "task_result", "task-result.jpg", degraded, 0.8 if not degraded else 0.45, page.url, "Task result")
+                except Exception:
+                    task_rows.clear()
+                    degraded = await screenshot_safe(page, outdir / "task-entry.jpg")
+                    add_scene(task_rows, "task_entry", "task_entry", "task-entry.jpg", True or degraded, 0.35, base_url, "Task entry (fallback)")
+                    degraded = await screenshot_safe(page, outdir / "task-result.jpg")
+                    add_scene(task_rows, "task_result", "task_result", "task-result.jpg", True or degraded, 0.35, page.url, "Task result (fallback)")
+            else:
+                degraded = await screenshot_safe(page, outdir / "task-entry.jpg")
+                add_scene(task_rows, "task_entry", "task_entry", "task-entry.jpg", True or degraded, 0.3, base_url, "Task entry (fallback)")
+                degraded = await screenshot_safe(page, outdir / "task-result.jpg")
+                add_scene(task_rows, "task_result", "task_result", "task-result.jpg", True or degraded, 0.3, page.url, "Task result (fallback)")
+        return search_input is not None
+
+    home_caps, has_search = await asyncio.gather(home_scenes(), search_scenes())
+
+    scene_rows = required_rows + task_rows + optional_rows + detail_rows + fallback_rows
+    capabilities = {"has_search_input": has_search, **home_caps}
+
+    return {"scenes": scene_rows, "capabilities": capabilities}
 
-    # 1) Required minimal scenes
-    degraded = screenshot_safe(page, outdir / "home-overview.png", full_page=True)
-    add_scene("home_overview", "home_overview", "home-overview.png", degraded, 0.95 if not degraded else 0.5, base_url, "Home overview")
 
-    top_nav = first_visible_locator(page, ["header", "[role='banner']", "nav"])
-    if top_nav is not None:
-        degraded = screenshot_safe(top_nav, outdir / "primary-nav.png", fallback_page=page)
+async def open_context(p, browser, args):
+    if browser is None:
+        Path(args.user_data_dir).mkdir(parents=True, exist_ok=True)
+        context = await p.chromium.launch_persistent_context(
+            args.user_data_dir,
+            headless=True,
+            viewport=VIEWPORT,
+            args=CHROMIUM_ARGS,
+        )
     else:
-        degraded = screenshot_safe(page, outdir / "primary-nav.png")
-        degraded = True
-    add_scene("primary_nav", "primary_nav", "primary-nav.png", degraded, 0.85 if not degraded else 0.45, base_url, "Primary navigation")
+        # A saved state carries the consent cookies, so repeat runs skip the overlay click.
+        state = args.storage_state if args.storage_state and Path(args.storage_state).exists() else None
+        context = await browser.new_context(viewport=VIEWPORT, storage_state=state)
+    context.set_default_timeout(ACTION_TIMEOUT_MS)
+    context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+    if browser is not None:
+        # Any route turns off Chromium's HTTP cache, so a profile dir keeps its own
+        # disk cache unrouted and these are installed only on fresh contexts.
+        await context.route("**/*", ResponseCache().handle)
+        # Registered last so it runs first; surviving requests fall back to the cache.
+        await context.route("**/*", _route_skip_analytics)
+    return context
+
+
+def merge_storage_state(path: Path, state: dict) -> None:
+    # Cookies are keyed by (name, domain, path) and origins by origin; this context's
+    # entries replace the saved ones and expired cookies are dropped. There is no await
+    # between the read and the write, so concurrent captures cannot lose each other's state.
+    try:
+        saved = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        saved = {}
+    now = time.time()
+    cookies = {(c["name"], c["domain"], c["path"]): c for c in saved.get("cookies", [])}
+    cookies.update(((c["name"], c["domain"], c["path"]), c) for c in state.get("cookies", []))
+    origins = {o["origin"]: o for o in saved.get("origins", [])}
+    origins.update((o["origin"], o) for o in state.get("origins", []))
+    merged = {
+        "cookies": [c for c in cookies.values() if not 0 < c.get("expires", -1) < now],
+        "origins": list(origins.values()),
+    }
+    ensure_dir(path.parent)
+    path.write_text(json.dumps(merged), encoding="utf-8")
+
 
-    content = first_visible_locator(page, ["main", "article", "[role='main']", "[class*='content' i]"])
-    if content is not None:
-        degraded = screenshot_safe(content, outdir / "primary-content.png", fallback_page=page)
+def write_manifest(manifest_out: Path, manifest: dict) -> None:
+    ensure_dir(manifest_out.parent)
+    if orjson is not None:
+        manifest_out.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
     else:
-        degraded = screenshot_safe(page, outdir / "primary-content.png")
-        degraded = True
-    add_scene("primary_content", "primary_content", "primary-content.png", degraded, 0.82 if not degraded else 0.4, base_url, "Primary content area")
-
-    search_input = first_visible_locator(
-        page,
-        [
-            "input#search",
-            "input[name='search_query']",
-            "input[type='search']",
-            "input[name*='search' i]",
-            "input[placeholder*='search' i]",
-            "form[role='search'] input",
-            "input[type='text']",
-        ],
-    )
+        manifest_out.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    if search_input is not None:
-        try:
-            search_input.click(timeout=3000)
-            search_input.fill(search_query)
-            page.wait_for_timeout(500)
-            degraded = screenshot_safe(page, outdir / "task-entry.png")
-            add_scene("task_entry", "task_entry", "task-entry.png", degraded, 0.8 if not degraded else 0.45, base_url, "Task entry")
-            page.keyboard.press("Enter")
-            page.wait_for_load_state("domcontentloaded", timeout=60000)
-            page.wait_for_timeout(2200)
-            degraded = screenshot_safe(page, outdir / "task-result.png")
-            add_scene("task_result", "task_result", "task-result.png", degraded, 0.8 if not degraded else 0.45, page.url, "Task result")
-        except Exception:
-            degraded = screenshot_safe(page, outdir / "task-entry.png")
-            add_scene("task_entry", "task_entry", "task-entry.png", True or degraded, 0.35, base_url, "Task entry (fallback)")
-            degraded = screenshot_safe(page, outdir / "task-result.png")
-            add_scene("task_result", "task_result", "task-result.png", True or degraded, 0.35, page.url, "Task result (fallback)")
+
+async def capture_one(context, args, base_url: str, outdir: Path, manifest_out: Path) -> None:
+    ensure_dir(outdir)
+    pool = PagePool(context)
+    if args.mode == "static":
+        saved, m = await capture_static(pool, base_url, outdir, args.search_query)
     else:
-        degraded = screenshot_safe(page, outdir / "task-entry.png")
-        add_scene("task_entry", "task_entry", "task-entry.png", True or degraded, 0.3, base_url, "Task entry (fallback)")
-        degraded = screenshot_safe(page, outdir / "task-result.png")
-        add_scene("task_result", "task_result", "task-result.png", True or degraded, 0.3, page.url, "Task result (fallback)")
+        m = await capture_dynamic(pool, base_url, outdir, args.search_query, args.max_shots, args.min_scenes)
+        saved = [row["file"] for row in m["scenes"]]
+    generated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+    if args.storage_state and not args.user_data_dir:
+        # Only fresh contexts load this file (a profile dir keeps its own cookies).
+        # Written synchronously, so concurrent captures never interleave the file.
+        # Merged rather than overwritten, so --urls-file keeps every host's cookies.
+        merge_storage_state(Path(args.storage_state), await context.storage_state())
+
+    write_manifest(manifest_out, {
+        "url": base_url,
+        "generated_at": generated_at,
+        "mode": args.mode,
+        "scenes": m["scenes"],
+        "capabilities": m["capabilities"],
+    })
+    if args.urls_file:
+        print(f"url: {base_url}")
+    print("saved screenshots:")
+    for name in saved:
+        print(f"- images/{name}")
+    print(f"manifest: {manifest_out}")
 
-    # 2) Optional scenes up to max_shots
-    goto_home(page, base_url)
-    optional_specs = []
 
-    side_nav = first_visible_locator(page, ["aside nav", "aside", "[role='navigation']"])
-    if side_nav is not None:
-        optional_specs.append(("side_navigation", "side_navigation", "side-navigation.png", side_nav, "Side navigation"))
+async def capture_many(args, jobs: list[tuple[str, Path, Path]]) -> list[tuple[str, BaseException]]:
+    # Imported here so --help and argument errors do not pay for loading Playwright.
+    from playwright.async_api import async_playwright
 
-    card = first_visible_locator(page, ["article", "[data-testid*='card' i]", "[class*='card' i]", "main a[href]"])
-    if card is not None:
-        optional_specs.append(("content_card", "content_card", "content-card.png", card, "Representative content card"))
+    async with async_playwright() as p:
+        browser = None
+        shared = None
+        if args.user_data_dir:
+            # A profile directory can back only one context, so every URL shares it.
+            shared = await open_context(p, None, args)
+        else:
+            browser = await p.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+        slots = asyncio.Semaphore(max(1, args.concurrency))
 
-    detail = first_detail_url(page, base_url)
-    if detail:
-        try:
-            page.goto(detail, wait_until="domcontentloaded", timeout=90000)
-            page.wait_for_timeout(2200)
-            optional_specs.append(("detail_page", "detail_page", "detail-page.png", page, "Detail page"))
-        except Exception:
-            pass
+        async def run(job: tuple[str, Path, Path]) -> None:
+            async with slots:
+                if shared is not None:
+                    await capture_one(shared, args, *job)
+                    return
+                context = await open_context(p, browser, args)
+                try:
+                    await capture_one(context, args, *job)
+                finally:
+                    await context.close()
 
-    for figure_id, scene_type, file_name, target, caption in optional_specs:
-        if len(scene_rows) >= max_shots:
-            break
-        degraded = screenshot_safe(target, outdir / file_name, fallback_page=page)
-        add_scene(
-            figure_id,
-            scene_type,
-            file_name,
-            degraded,
-            0.72 if not degraded else 0.4,
-            page.url,
-            caption,
-        )
+        results = await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+        if shared is not None:
+            await shared.close()
+        if browser is not None:
+            await browser.close()
 
-    # Ensure min scenes requirement.
-    if len(scene_rows) < max(1, min_scenes):
-        degraded = screenshot_safe(page, outdir / "fallback-scene.png")
-        add_scene("fallback_scene", "fallback", "fallback-scene.png", True or degraded, 0.2, page.url, "Fallback scene")
+    return [(job[0], exc) for job, exc in zip(jobs, results) if isinstance(exc, BaseException)]
 
-    capabilities = {
-        "has_search_input": search_input is not None,
-        "has_top_nav": top_nav is not None,
-        "has_side_nav": side_nav is not None,
-        "has_card": card is not None,
-    }
 
-    return {"scenes": scene_rows, "capabilities": capabilities}
+def read_urls(path: str) -> list[str]:
+    urls = []
+    for raw in Path(path).read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return urls
+
+
+def url_slug(index: int, url: str) -> str:
+    parsed = urlparse(url)
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", parsed.netloc + parsed.path).strip("-")
+    return f"{index:02d}-{slug or 'site'}"
 
 
 def main() -> int:
     args = parse_args()
-    base_url = args.url
-    outdir = Path(args.outdir)
-    outdir.mkdir(parents=True, exist_ok=True)
-    manifest_out = manifest_path(args, outdir)
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(viewport={"width": 1440, "height": 1024})
-
-        if args.mode == "static":
-            saved, m = capture_static(page, base_url, outdir, args.search_query)
-            manifest = {
-                "url": base_url,
-                "generated_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
-                "mode": "static",
-                "scenes": m["scenes"],
-                "capabilities": m["capabilities"],
-            }
-            print("saved screenshots:")
-            for name in saved:
-                print(f"- images/{name}")
-        else:
-            m = capture_dynamic(page, base_url, outdir, args.search_query, args.max_shots, args.min_scenes)
-            manifest = {
-                "url": base_url,
-                "generated_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
-                "mode": "dynamic",
-                "scenes": m["scenes"],
-                "capabilities": m["capabilities"],
-            }
-            print("saved screenshots:")
-            for row in m["scenes"]:
-                print(f"- images/{row['file']}")
-
-        browser.close()
-
-    manifest_out.parent.mkdir(parents=True, exist_ok=True)
-    manifest_out.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"manifest: {manifest_out}")
-    return 0
+    if args.urls_file:
+        # --outdir is the batch root: <outdir>/<NN-host-path>/images + capture_manifest.json.
+        root = Path(args.outdir)
+        jobs = []
+        for index, url in enumerate(read_urls(args.urls_file), start=1):
+            job_dir = root / url_slug(index, url)
+            jobs.append((url, job_dir / "images", job_dir / "capture_manifest.json"))
+        if not jobs:
+            print(f"no URLs in {args.urls_file}", file=sys.stderr)
+            return 1
+    else:
+        outdir = Path(args.outdir)
+        jobs = [(args.url, outdir, manifest_path(args, outdir))]
+
+    failures = asyncio.run(capture_many(args, jobs))
+    if failures and not args.urls_file:
+        raise failures[0][1]
+    for url, exc in failures:
+        print(f"capture failed: {url}: {exc}", file=sys.stderr)
+    return 1 if failures else 0
 
 
 if __name__ == "__main__":
@@ -3,8 +3,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional faster JSON encoder
+    orjson = None
+
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Merge capture manifest into manual spec figure blocks")
@@ -23,6 +29,14 @@ def main() -> int:
     by_figure = {s.get("figure_id"): s for s in manifest.get("scenes", []) if s.get("figure_id")}
     removed: list[str] = []
 
+    # One directory listing instead of a stat() per figure.
+    present: set[str] = set()
+    if args.images_root:
+        try:
+            present = {entry.name for entry in os.scandir(args.images_root)}
+        except FileNotFoundError:
+            pass
+
     for section in spec.get("sections", []):
         new_blocks = []
         for block in section.get("blocks", []):
@@ -37,11 +51,9 @@ def main() -> int:
                 continue
 
             image_rel = scene.get("image_rel") or block.get("image_rel", "")
-            if args.images_root and image_rel:
-                image_path = (args.images_root / Path(image_rel).name).resolve()
-                if not image_path.exists():
-                    removed.append(fig_id or "unknown")
-                    continue
+            if args.images_root and image_rel and Path(image_rel).name not in present:
+                removed.append(fig_id or "unknown")
+                continue
 
             block["image_rel"] = image_rel
             block["caption"] = scene.get("caption", block.get("caption", ""))
@@ -58,7 +70,12 @@ def main() -> int:
     trace["removed_figures"] = removed
 
     args.out.parent.mkdir(parents=True, exist_ok=True)
-    args.out.write_text(json.dumps(spec, ensure_ascii=False, indent=2), encoding="utf-8")
+    if orjson is not None:
+        args.out.write_bytes(orjson.dumps(spec, option=orjson.OPT_INDENT_2))
+    else:
+        # Streamed to the file rather than joined into one big string first.
+        with args.out.open("w", encoding="utf-8") as f:
+            json.dump(spec, f, ensure_ascii=False, indent=2)
     print(f"out spec: {args.out}")
     print(f"removed figures: {len(removed)}")
     return 0
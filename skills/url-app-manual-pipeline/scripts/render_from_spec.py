@@ -2,23 +2,14 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import re
 from pathlib import Path
 
 
-def parse_args() -> argparse.Namespace:
-    p = argparse.ArgumentParser(description="Render dynamic tex/md from manual spec")
-    p.add_argument("--spec", type=Path, required=True)
-    p.add_argument("--tex-template", type=Path, required=True)
-    p.add_argument("--md-template", type=Path, required=True)
-    p.add_argument("--out-tex", type=Path, required=True)
-    p.add_argument("--out-md", type=Path, required=True)
-    return p.parse_args()
-
-
-def tex_escape(text: str) -> str:
-    repl = {
+_TEX_TRANS = str.maketrans(
+    {
         "\\": r"\textbackslash{}",
         "&": r"\&",
         "%": r"\%",
@@ -30,102 +21,112 @@ def tex_escape(text: str) -> str:
         "~": r"\textasciitilde{}",
         "^": r"\textasciicircum{}",
     }
-    out = text
-    for k, v in repl.items():
-        out = out.replace(k, v)
-    return out
+)
+_WS_RE = re.compile(r"\s+")
+_MD_HEADING = ("#", "##", "###", "####", "#####", "######")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Render dynamic tex/md from manual spec")
+    p.add_argument("--spec", type=Path, required=True)
+    p.add_argument("--tex-template", type=Path, required=True)
+    p.add_argument("--md-template", type=Path, required=True)
+    p.add_argument("--out-tex", type=Path, required=True)
+    p.add_argument("--out-md", type=Path, required=True)
+    return p.parse_args()
+
+
+def tex_escape(text: str) -> str:
+    return text.translate(_TEX_TRANS)
 
 
 def clean_md(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip()
+    return _WS_RE.sub(" ", text).strip()
+
+
+def sorted_sections(spec: dict) -> list[dict]:
+    return sorted(spec.get("sections", []), key=lambda x: x.get("order", 9999))
 
 
-def render_tex_body(spec: dict) -> str:
-    lines: list[str] = []
-    sections = sorted(spec.get("sections", []), key=lambda x: x.get("order", 9999))
+def render_tex_body(sections: list[dict]) -> str:
+    buf = io.StringIO()
+    w = buf.write
     for section in sections:
         level = int(section.get("level", 1))
         title = tex_escape(section.get("title", "Untitled"))
         if level <= 1:
-            lines.append(f"\\section{{{title}}}")
+            w(f"\\section{{{title}}}\n")
         else:
-            lines.append(f"\\subsection{{{title}}}")
+            w(f"\\subsection{{{title}}}\n")
 
         for block in section.get("blocks", []):
             block_id = block.get("block_id", "unknown")
             btype = block.get("type")
-            lines.append(f"% MANUAL_BLOCK:{block_id}")
+            w(f"% MANUAL_BLOCK:{block_id}\n")
 
             if btype == "paragraph":
-                lines.append(tex_escape(block.get("text", "")))
-                lines.append("")
+                w(f"{tex_escape(block.get('text', ''))}\n\n")
             elif btype == "bullet_list":
-                lines.append("\\begin{itemize}")
+                w("\\begin{itemize}\n")
                 for item in block.get("items", []):
-                    lines.append(f"  \\item {tex_escape(item)}")
-                lines.append("\\end{itemize}")
+                    w(f"  \\item {tex_escape(item)}\n")
+                w("\\end{itemize}\n")
             elif btype == "numbered_list":
-                lines.append("\\begin{enumerate}")
+                w("\\begin{enumerate}\n")
                 for item in block.get("items", []):
-                    lines.append(f"  \\item {tex_escape(item)}")
-                lines.append("\\end{enumerate}")
+                    w(f"  \\item {tex_escape(item)}\n")
+                w("\\end{enumerate}\n")
             elif btype == "table":
                 cols = block.get("columns", [])
                 rows = block.get("rows", [])
                 if not cols:
                     cols = ["Column 1", "Column 2", "Column 3"]
-                n = max(1, len(cols))
-                width = 0.92 / n
+                ncols = len(cols)
+                width = 0.92 / max(1, ncols)
                 layout = " ".join([f"p{{{width:.2f}\\linewidth}}" for _ in cols])
-                lines.append(f"\\begin{{longtable}}{{{layout}}}")
-                lines.append("\\toprule")
-                lines.append(" & ".join(tex_escape(c) for c in cols) + r" \\")
-                lines.append("\\midrule")
-                lines.append("\\endhead")
+                w(f"\\begin{{longtable}}{{{layout}}}\n\\toprule\n")
+                w(" & ".join([tex_escape(c) for c in cols]) + " \\\\\n")
+                w("\\midrule\n\\endhead\n")
                 for row in rows:
-                    padded = list(row) + [""] * (len(cols) - len(row))
-                    lines.append(" & ".join(tex_escape(c) for c in padded[: len(cols)]) + r" \\")
-                lines.append("\\bottomrule")
-                lines.append("\\end{longtable}")
+                    cells = [tex_escape(c) for c in row[:ncols]]
+                    cells.extend([""] * (ncols - len(cells)))
+                    w(" & ".join(cells) + " \\\\\n")
+                w("\\bottomrule\n\\end{longtable}\n")
             elif btype == "figure":
                 fig_id = block.get("figure_id", block_id)
-                lines.append(f"% MANUAL_FIG:{fig_id}")
-                image_rel = block.get("image_rel", "")
+                image_rel = tex_escape(block.get("image_rel", ""))
                 caption = tex_escape(block.get("caption", ""))
-                lines.append(
-                    "\\screenshotbox{"
-                    + tex_escape(image_rel)
-                    + "}{"
-                    + caption
-                    + "}{Captured from live UI}"
-                )
+                w(f"% MANUAL_FIG:{fig_id}\n")
+                w(f"\\screenshotbox{{{image_rel}}}{{{caption}}}{{Captured from live UI}}\n")
             else:
-                lines.append("% unsupported block type")
-            lines.append("")
-    return "\n".join(lines).rstrip() + "\n"
+                w("% unsupported block type\n")
+            w("\n")
+    return buf.getvalue().rstrip() + "\n"
 
 
-def render_md_body(spec: dict) -> str:
-    lines: list[str] = []
-    sections = sorted(spec.get("sections", []), key=lambda x: x.get("order", 9999))
+def render_md_body(sections: list[dict]) -> str:
+    buf = io.StringIO()
+    w = buf.write
     for section in sections:
         level = int(section.get("level", 1))
         title = clean_md(section.get("title", "Untitled"))
-        lines.append("#" * max(1, min(6, level)) + f" {title}")
-        lines.append("")
+        w(f"{_MD_HEADING[max(1, min(6, level)) - 1]} {title}\n\n")
         for block in section.get("blocks", []):
             block_id = block.get("block_id", "unknown")
-            btype = block.get("type")
-            lines.append(f"MANUAL_BLOCK:{block_id}")
-            lines.append("")
+            w(f"MANUAL_BLOCK:{block_id}\n\n")
             # Dynamic DOCX baseline is token-only; real content is injected by sync scripts.
             # This avoids duplicate paragraphs/lists/tables/figures from pandoc pre-rendering.
-            if btype == "figure":
+            if block.get("type") == "figure":
                 fig_id = block.get("figure_id", block_id)
-                lines.append(f"MANUAL_FIG:{fig_id}")
-                lines.append("")
-            lines.append("")
-    return "\n".join(lines).rstrip() + "\n"
+                w(f"MANUAL_FIG:{fig_id}\n\n")
+            w("\n")
+    return buf.getvalue().rstrip() + "\n"
+
+
+def fill_tokens(text: str, values: dict[str, str]) -> str:
+    # One scan over the template; longer tokens first so none shadows another.
+    pattern = re.compile("|".join(re.escape(k) for k in sorted(values, key=len, reverse=True)))
+    return pattern.sub(lambda m: values[m.group(0)], text)
 
 
 def main() -> int:
@@ -135,8 +136,9 @@ def main() -> int:
     tex_tpl = args.tex_template.read_text(encoding="utf-8")
     md_tpl = args.md_template.read_text(encoding="utf-8")
 
-    tex_body = render_tex_body(spec)
-    md_body = render_md_body(spec)
+    sections = sorted_sections(spec)
+    tex_body = render_tex_body(sections)
+    md_body = render_md_body(sections)
 
     meta = spec.get("meta", {})
     ctx = {
@@ -148,12 +150,11 @@ def main() -> int:
         "__MD_BODY__": md_body,
     }
 
-    for k, v in ctx.items():
-        tex_tpl = tex_tpl.replace(k, v)
-        md_tpl = md_tpl.replace(k, v)
+    tex_tpl = fill_tokens(tex_tpl, ctx)
+    md_tpl = fill_tokens(md_tpl, ctx)
 
-    args.out_tex.parent.mkdir(parents=True, exist_ok=True)
-    args.out_md.parent.mkdir(parents=True, exist_ok=True)
+    for out_dir in {args.out_tex.parent, args.out_md.parent}:
+        out_dir.mkdir(parents=True, exist_ok=True)
     args.out_tex.write_text(tex_tpl, encoding="utf-8")
     args.out_md.write_text(md_tpl, encoding="utf-8")
 
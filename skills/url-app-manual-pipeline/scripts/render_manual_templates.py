@@ -2,11 +2,28 @@
 from __future__ import annotations
 
 import argparse
+import re
 from datetime import date
 from pathlib import Path
 from urllib.parse import urlparse
 
 
+_TEX_TRANS = str.maketrans(
+    {
+        "\\": r"\textbackslash{}",
+        "&": r"\&",
+        "%": r"\%",
+        "$": r"\$",
+        "#": r"\#",
+        "_": r"\_",
+        "{": r"\{",
+        "}": r"\}",
+        "~": r"\textasciitilde{}",
+        "^": r"\textasciicircum{}",
+    }
+)
+
+
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Render manual templates from URL context")
     p.add_argument("--url", required=True)
@@ -19,22 +36,7 @@ def parse_args() -> argparse.Namespace:
 
 
 def latex_escape(text: str) -> str:
-    repl = {
-        "\\": r"\textbackslash{}",
-        "&": r"\&",
-        "%": r"\%",
-        "$": r"\$",
-        "#": r"\#",
-        "_": r"\_",
-        "{": r"\{",
-        "}": r"\}",
-        "~": r"\textasciitilde{}",
-        "^": r"\textasciicircum{}",
-    }
-    out = text
-    for k, v in repl.items():
-        out = out.replace(k, v)
-    return out
+    return text.translate(_TEX_TRANS)
 
 
 def with_scheme(url: str) -> str:
@@ -44,6 +46,12 @@ def with_scheme(url: str) -> str:
     return u
 
 
+def fill_tokens(text: str, values: dict[str, str]) -> str:
+    # One scan over the template; longer tokens first so none shadows another.
+    pattern = re.compile("|".join(re.escape(k) for k in sorted(values, key=len, reverse=True)))
+    return pattern.sub(lambda m: values[m.group(0)], text)
+
+
 def main() -> int:
     args = parse_args()
     url = with_scheme(args.url)
@@ -65,13 +73,10 @@ def main() -> int:
     tex_text = args.tex_template.read_text(encoding="utf-8")
     md_text = args.md_template.read_text(encoding="utf-8")
 
-    for k, v in ctx.items():
-        tex_text = tex_text.replace(k, v)
-        md_text = md_text.replace(k, v)
-
-    # LaTeX-specific tokens should not leak.
-    tex_text = tex_text.replace("__APP_TARGET__", ctx["__APP_TARGET_LATEX__"])
-    tex_text = tex_text.replace("__HOST__", ctx["__HOST_LATEX__"])
+    # LaTeX output takes the escaped variants of the plain-text tokens.
+    tex_ctx = {**ctx, "__APP_TARGET__": ctx["__APP_TARGET_LATEX__"], "__HOST__": ctx["__HOST_LATEX__"]}
+    tex_text = fill_tokens(tex_text, tex_ctx)
+    md_text = fill_tokens(md_text, ctx)
 
     args.out_tex.write_text(tex_text, encoding="utf-8")
     args.out_md.write_text(md_text, encoding="utf-8")
@@ -26,6 +26,12 @@ MANUAL_DYNAMIC_MAX_SHOTS="${MANUAL_DYNAMIC_MAX_SHOTS:-12}"
 MANUAL_DYNAMIC_MIN_SCENES="${MANUAL_DYNAMIC_MIN_SCENES:-1}"
 MANUAL_POC_DIR="${MANUAL_POC_DIR:-$JOB_DIR/poc_dynamic}"
 MANUAL_LATEX_ENGINE="${MANUAL_LATEX_ENGINE:-auto}"
+# Opt-in: a Chromium profile dir reused across captures (warm HTTP cache, but also
+# cookies/login/consent state). Empty = a fresh profile every run.
+MANUAL_BROWSER_PROFILE_DIR="${MANUAL_BROWSER_PROFILE_DIR:-}"
+# Opt-in, used only without a profile dir: a storage-state JSON loaded before and
+# merged back after each capture (carries cookies, e.g. consent). Empty = no saved state.
+MANUAL_BROWSER_STATE_FILE="${MANUAL_BROWSER_STATE_FILE:-}"
 
 SOURCE_DIR="$JOB_DIR/source"
 OUTPUT_DIR="$JOB_DIR/output"
@@ -36,6 +42,13 @@ POC_SOURCE_DIR="$MANUAL_POC_DIR/source"
 POC_OUTPUT_DIR="$MANUAL_POC_DIR/output"
 POC_IMG_DIR="$POC_SOURCE_DIR/images"
 
+CAPTURE_PROFILE_ARGS=()
+if [[ -n "$MANUAL_BROWSER_PROFILE_DIR" ]]; then
+  CAPTURE_PROFILE_ARGS=(--user-data-dir "$MANUAL_BROWSER_PROFILE_DIR")
+elif [[ -n "$MANUAL_BROWSER_STATE_FILE" ]]; then
+  CAPTURE_PROFILE_ARGS=(--storage-state "$MANUAL_BROWSER_STATE_FILE")
+fi
+
 validate_venv_dir() {
   case "$VENV_DIR" in
     /mnt/DATA/test/.venv|/mnt/DATA/test/.venv/*)
@@ -272,7 +285,8 @@ if [[ "$MANUAL_TEMPLATE_MODE" == "dynamic" ]]; then
     --mode dynamic \
     --manifest-out "$MANIFEST_PATH" \
     --max-shots "$MANUAL_DYNAMIC_MAX_SHOTS" \
-    --min-scenes "$MANUAL_DYNAMIC_MIN_SCENES"
+    --min-scenes "$MANUAL_DYNAMIC_MIN_SCENES" \
+    ${CAPTURE_PROFILE_ARGS[@]+"${CAPTURE_PROFILE_ARGS[@]}"}
 
   "$PY_BIN" "$SKILL_DIR/scripts/build_manual_spec.py" \
     --url "$URL" \
@@ -338,7 +352,8 @@ fi
   --outdir "$IMG_DIR" \
   --search-query "$SEARCH_QUERY" \
   --mode static \
-  --manifest-out "$SOURCE_DIR/capture_manifest.json"
+  --manifest-out "$SOURCE_DIR/capture_manifest.json" \
+  ${CAPTURE_PROFILE_ARGS[@]+"${CAPTURE_PROFILE_ARGS[@]}"}
 verify_required_screenshots
 
 build_latex_pdf "static" "$MANUAL_LOCALE" "$SOURCE_DIR" "main.tex" "$OUTPUT_DIR/manual.pdf"
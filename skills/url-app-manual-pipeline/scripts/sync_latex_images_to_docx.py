@@ -4,14 +4,37 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
+from copy import deepcopy
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable, Iterator
 
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 from docx.shared import Inches
 from docx.text.paragraph import Paragraph
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional faster JSON parser
+    orjson = None
+
+
+_NUM_PREFIX_RE = re.compile(r"^\d+(\.\d+)*\.?\s*")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_HEADING_RE = re.compile(r"Heading\s+(\d+)")
+_SCREENSHOT_RE = re.compile(r"\\screenshotbox\{([^}]*)\}\{([^}]*)\}\{([^}]*)\}")
+_TOKEN_RE = re.compile(r"(?:\[\[)?MANUAL_FIG:([A-Za-z0-9_.:-]+)(?:\]\])?")
+_P_TAG = qn("w:p")
+_DRAWING_TAG = qn("w:drawing")
+_DOC_PR_TAG = qn("wp:docPr")
+SHINGLE_LEN = 4
+_DEFAULT_WIDTH = Inches(6.2)
+
 
 @dataclass
 class Shot:
@@ -19,11 +42,12 @@ class Shot:
     caption: str
     anchor: str
     number: int
+    anchor_key: str = ""
 
 
+@lru_cache(maxsize=None)
 def canonical(text: str) -> str:
-    text = re.sub(r"^\d+(\.\d+)*\.?\s*", "", text.strip())
-    return re.sub(r"[^a-z0-9]+", "", text.lower())
+    return _NON_ALNUM_RE.sub("", _NUM_PREFIX_RE.sub("", text.strip()).lower())
 
 
 def parse_args():
@@ -36,9 +60,8 @@ def parse_args():
 
 
 def parse_latex_shots(tex_path: Path) -> list[Shot]:
-    tex = tex_path.read_text(encoding="utf-8")
-    pattern = re.compile(r"\\screenshotbox\{([^}]*)\}\{([^}]*)\}\{([^}]*)\}")
-    rows = [(m.group(1).strip(), m.group(2).strip()) for m in pattern.finditer(tex)]
+    tex = tex_path.read_bytes().decode("utf-8")
+    rows = [(m.group(1).strip(), m.group(2).strip()) for m in _SCREENSHOT_RE.finditer(tex)]
 
     anchors = [
         "Home Page Overview",
@@ -54,10 +77,49 @@ def parse_latex_shots(tex_path: Path) -> list[Shot]:
     shots: list[Shot] = []
     for i, (img_rel, cap) in enumerate(rows):
         anchor = anchors[i] if i < len(anchors) else "Example Task Flows"
-        shots.append(Shot(img_rel=img_rel, caption=cap, anchor=anchor, number=i + 1))
+        shots.append(Shot(img_rel=img_rel, caption=cap, anchor=anchor, number=i + 1, anchor_key=canonical(anchor)))
     return shots
 
 
+def paragraph_style_names(doc: Document) -> tuple[dict[str, str], str]:
+    # Style id -> name for paragraph styles, plus the default style's name: what
+    # paragraph.style.name resolves to, without a styles-part lookup per paragraph.
+    names = {st.style_id: st.name or "" for st in doc.styles if st.type == WD_STYLE_TYPE.PARAGRAPH}
+    default = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    return names, (default.name or "") if default is not None else ""
+
+
+def find_caption_style(doc: Document):
+    # Looked up once per document; assigning the style object skips the by-name
+    # lookup (and the KeyError for a missing style) on every caption. Names win over
+    # style ids, as in python-docx's own lookup, so "ImageCaption" finds "Image Caption".
+    paragraph_styles = [st for st in doc.styles if st.type == WD_STYLE_TYPE.PARAGRAPH]
+    for name in ("ImageCaption", "Caption"):
+        for attr in ("name", "style_id"):
+            for st in paragraph_styles:
+                if getattr(st, attr) == name:
+                    return st
+    return None
+
+
+def resolve_images(base: Path, rels: Iterable[str]) -> dict[str, str | None]:
+    # Each distinct image is resolved and checked once. add_picture still gets the
+    # path, so the picture keeps its file name in the docx.
+    resolved: dict[str, str | None] = {}
+    for rel in rels:
+        if rel not in resolved:
+            path = (base / rel).resolve()
+            resolved[rel] = str(path) if path.is_file() else None
+    return resolved
+
+
+def iter_paragraphs(doc: Document) -> Iterator[Paragraph]:
+    # Same body-level paragraphs as doc.paragraphs, without building the list.
+    body = doc._body
+    for el in body._element.iterchildren(_P_TAG):
+        yield Paragraph(el, body)
+
+
 def remove_paragraph(paragraph: Paragraph) -> None:
     p = paragraph._element
     parent = p.getparent()
@@ -66,7 +128,7 @@ def remove_paragraph(paragraph: Paragraph) -> None:
 
 
 def paragraph_has_drawing(paragraph: Paragraph) -> bool:
-    return bool(paragraph._element.xpath(".//*[local-name()='drawing']"))
+    return next(paragraph._element.iter(_DRAWING_TAG), None) is not None
 
 
 def clear_paragraph(paragraph: Paragraph) -> None:
@@ -75,55 +137,90 @@ def clear_paragraph(paragraph: Paragraph) -> None:
         p.remove(child)
 
 
-def insert_paragraph_after(paragraph: Paragraph, text: str | None = None, style: str | None = None) -> Paragraph:
-    new_p = OxmlElement("w:p")
-    paragraph._p.addnext(new_p)
-    p = Paragraph(new_p, paragraph._parent)
-    if style:
-        try:
-            p.style = style
-        except Exception:
-            pass
-    if text is not None:
-        p.add_run(text)
-    return p
-
-
-def get_heading_level(paragraph: Paragraph) -> int | None:
-    if not paragraph.style:
-        return None
-    name = paragraph.style.name or ""
-    m = re.match(r"Heading\s+(\d+)", name)
-    if not m:
-        return None
-    return int(m.group(1))
-
-
-def find_heading_indices(doc: Document) -> dict[str, int]:
-    idx: dict[str, int] = {}
-    for i, p in enumerate(doc.paragraphs):
-        lvl = get_heading_level(p)
-        if lvl is None:
-            continue
-        c = canonical(p.text)
-        if c:
-            idx[c] = i
-    return idx
+def add_picture(run, img_path: str, drawings: dict[str, object]) -> None:
+    # A repeated image reuses the first drawing (and its image relationship) with a
+    # fresh shape id, instead of re-reading and re-hashing the file in add_picture.
+    first = drawings.get(img_path)
+    if first is None:
+        run.add_picture(img_path, width=_DEFAULT_WIDTH)
+        drawings[img_path] = run._r.find(_DRAWING_TAG)
+        return
+    drawing = deepcopy(first)
+    shape_id = run.part.next_id
+    for doc_pr in drawing.iter(_DOC_PR_TAG):
+        doc_pr.set("id", str(shape_id))
+        doc_pr.set("name", f"Picture {shape_id}")
+    run._r.append(drawing)
+
+
+def build_image_paragraph(parent, img_path: str, drawings: dict[str, object]) -> Paragraph:
+    # Figure paragraphs are filled while detached and spliced into the body once,
+    # so the live tree sees one insert per paragraph instead of an edit per run/property.
+    para = Paragraph(OxmlElement("w:p"), parent)
+    para.alignment = 1
+    add_picture(para.add_run(), img_path, drawings)
+    return para
+
 
+def build_caption_paragraph(parent, text: str, style) -> Paragraph:
+    para = Paragraph(OxmlElement("w:p"), parent)
+    para.add_run(text)
+    para.alignment = 1
+    if style is not None:
+        para.style = style
+    return para
 
-def find_heading_index_fuzzy(heading_idx: dict[str, int], target: str) -> int | None:
-    if target in heading_idx:
-        return heading_idx[target]
-    for k, v in heading_idx.items():
+
+def shingles(text: str) -> set[str]:
+    return {text[i : i + SHINGLE_LEN] for i in range(len(text) - SHINGLE_LEN + 1)}
+
+
+@dataclass
+class HeadingIndex:
+    # Canonical heading -> paragraph index, plus a shingle index so fuzzy lookups
+    # only substring-test headings that share a SHINGLE_LEN-char run with the target.
+    exact: dict[str, int]
+    keys: list[str]
+    short: list[int]
+    by_shingle: dict[str, list[int]]
+
+    @classmethod
+    def build(cls, heading_idx: dict[str, int]) -> HeadingIndex:
+        keys = list(heading_idx)
+        short: list[int] = []
+        by_shingle: dict[str, list[int]] = {}
+        for pos, key in enumerate(keys):
+            if len(key) < SHINGLE_LEN:
+                short.append(pos)
+            for sh in shingles(key):
+                by_shingle.setdefault(sh, []).append(pos)
+        return cls(heading_idx, keys, short, by_shingle)
+
+
+def find_heading_index_fuzzy(index: HeadingIndex, target: str) -> int | None:
+    if target in index.exact:
+        return index.exact[target]
+    if len(target) < SHINGLE_LEN:
+        candidates = range(len(index.keys))
+    else:
+        # A heading containing the target, or contained in it, shares at least one
+        # shingle with it unless it is too short to have any.
+        found = set(index.short)
+        for sh in shingles(target):
+            found.update(index.by_shingle.get(sh, ()))
+        candidates = sorted(found)
+    # First match in document order, as a plain scan over the headings would give.
+    for pos in candidates:
+        k = index.keys[pos]
         if target in k or k in target:
-            return v
+            return index.exact[k]
     return None
 
 
-def find_section_end_index(doc: Document, start_idx: int, start_level: int) -> int:
-    end = len(doc.paragraphs) - 1
-    for j in range(start_idx + 1, len(doc.paragraphs)):
-        lvl = get_heading_level(doc.paragraphs[j])
+def find_section_end_index(levels: list[int | None], start_idx: int, start_level: int) -> int:
+    end = len(levels) - 1
+    for j in range(start_idx + 1, len(levels)):
+        lvl = levels[j]
         if lvl is None:
             continue
         if lvl <= start_level:
@@ -132,9 +229,9 @@ def find_section_end_index(doc: Document, start_idx: int, start_level: int) -> i
     return max(end, start_idx)
 
 
-def clear_existing_shot_blocks(doc: Document, captions: set[str]) -> int:
-    removed = 0
-    i = 0
+def scan_document(doc: Document, captions: set[str]) -> tuple[list[Paragraph], list[int | None], dict[str, int], int]:
+    # One walk drops old shot blocks and indexes headings. Returns the surviving
+    # paragraphs, their heading levels, canonical heading -> index, and removed count.
     legacy_hints = (
         "overview",
         "navigation controls",
@@ -143,69 +240,90 @@ def clear_existing_shot_blocks(doc: Document, captions: set[str]) -> int:
         "flow a-",
         "flow b-",
     )
-    while i < len(doc.paragraphs):
-        p = doc.paragraphs[i]
+    kept: list[Paragraph] = []
+    levels: list[int | None] = []
+    heading_idx: dict[str, int] = {}
+    to_remove: list[Paragraph] = []
+    style_names, default_style = paragraph_style_names(doc)
+    # Removals wait until after the walk, so the body can be iterated live.
+    for p in iter_paragraphs(doc):
         txt = (p.text or "").strip()
-        style_name = (p.style.name or "") if p.style else ""
+        style_name = style_names.get(p._p.style, default_style)
         is_caption_style = "caption" in style_name.lower() or style_name in ("ImageCaption", "Caption")
         is_known_caption = txt in captions or any(h in txt.lower() for h in legacy_hints)
         if is_caption_style and is_known_caption:
-            remove_paragraph(p)
-            removed += 1
-            if i - 1 >= 0:
-                prev = doc.paragraphs[i - 1]
+            to_remove.append(p)
+            # The image paragraph is the surviving predecessor; drawings are only
+            # looked up here, not for every paragraph.
+            if kept:
+                prev = kept[-1]
                 if paragraph_has_drawing(prev) and not (prev.text or "").strip():
-                    remove_paragraph(prev)
-                    removed += 1
-                    i -= 1
+                    to_remove.append(prev)
+                    kept.pop()
+                    levels.pop()
             continue
-        i += 1
-    return removed
+        m = _HEADING_RE.match(style_name)
+        lvl = int(m.group(1)) if m else None
+        if lvl is not None:
+            c = canonical(p.text)
+            if c:
+                heading_idx[c] = len(kept)
+        kept.append(p)
+        levels.append(lvl)
+    # Detached only after the walk, so the scan never sees a tree it has edited.
+    for p in to_remove:
+        remove_paragraph(p)
+    return kept, levels, heading_idx, len(to_remove)
 
 
 def sync_dynamic(args: argparse.Namespace) -> int:
     if args.spec is None:
         return 1
 
-    spec = json.loads(args.spec.read_text(encoding="utf-8"))
-    figure_map: dict[str, dict] = {}
-    for section in spec.get("sections", []):
-        for block in section.get("blocks", []):
-            if block.get("type") == "figure" and block.get("figure_id"):
-                figure_map[block["figure_id"]] = block
-
-    token_re = re.compile(r"(?:\[\[)?MANUAL_FIG:([A-Za-z0-9_.:-]+)(?:\]\])?")
+    if orjson is not None:
+        spec = orjson.loads(args.spec.read_bytes())
+    else:
+        spec = json.loads(args.spec.read_text(encoding="utf-8"))
+    # Figure ids are interned so the token lookups below hit on identity.
+    figure_map: dict[str, dict] = {
+        sys.intern(block["figure_id"]): block
+        for section in spec.get("sections", ())
+        for block in section.get("blocks", ())
+        if block.get("type") == "figure" and block.get("figure_id")
+    }
+
+    images = resolve_images(args.tex.parent, (fig.get("image_rel", "") for fig in figure_map.values()))
     doc = Document(str(args.docx))
+    caption_style = find_caption_style(doc)
+    drawings: dict[str, object] = {}
     replaced = 0
 
-    for p in list(doc.paragraphs):
-        m = token_re.search((p.text or "").strip())
+    # Snapshot: captions are inserted while walking.
+    for p in list(iter_paragraphs(doc)):
+        text = p.text or ""
+        # Most paragraphs carry no token; a substring test rejects them before the regex.
+        if "MANUAL_FIG:" not in text:
+            continue
+        m = _TOKEN_RE.search(text.strip())
         if not m:
             continue
-        fig_id = m.group(1).strip()
+        fig_id = sys.intern(m.group(1).strip())
         fig = figure_map.get(fig_id)
         if not fig:
             p.text = ""
             continue
 
-        img_path = (args.tex.parent / fig.get("image_rel", "")).resolve()
-        if not img_path.exists():
+        img_path = images[fig.get("image_rel", "")]
+        if img_path is None:
             p.text = ""
             continue
 
         clear_paragraph(p)
         p.alignment = 1
-        run = p.add_run()
-        run.add_picture(str(img_path), width=Inches(6.2))
-
-        cap_para = insert_paragraph_after(p, f"Figure {replaced + 1}. {fig.get('caption', '')}")
-        cap_para.alignment = 1
-        for style_name in ("ImageCaption", "Caption"):
-            try:
-                cap_para.style = style_name
-                break
-            except Exception:
-                continue
+        add_picture(p.add_run(), img_path, drawings)
+
+        cap_para = build_caption_paragraph(p._parent, f"Figure {replaced + 1}. {fig.get('caption', '')}", caption_style)
+        p._p.addnext(cap_para._p)
         replaced += 1
 
     out = args.out or args.docx
@@ -223,47 +341,51 @@ def sync_legacy(args: argparse.Namespace) -> int:
     doc = Document(str(args.docx))
 
     captions = {s.caption for s in shots} | {f"Figure {s.number}. {s.caption}" for s in shots}
-    removed = clear_existing_shot_blocks(doc, captions)
+    paragraphs, levels, heading_idx, removed = scan_document(doc, captions)
+
+    # Inserted figures never add headings, so every anchor's section end can be
+    # resolved once up front instead of re-indexing the document per shot.
+    heading_index = HeadingIndex.build(heading_idx)
+    end_by_anchor: dict[str, Paragraph | None] = {}
+    for shot in shots:
+        if shot.anchor in end_by_anchor:
+            continue
+        start_idx = find_heading_index_fuzzy(heading_index, shot.anchor_key)
+        if start_idx is None:
+            end_by_anchor[shot.anchor] = None
+            continue
+        level = levels[start_idx] or 1
+        end_by_anchor[shot.anchor] = paragraphs[find_section_end_index(levels, start_idx, level)]
 
-    heading_idx = find_heading_indices(doc)
     inserted = 0
     tail_by_anchor: dict[str, Paragraph] = {}
+    # Sections that end on the same paragraph stack their figures after each other.
+    tail_by_end: dict = {}
 
+    images = resolve_images(args.tex.parent, (s.img_rel for s in shots))
+    caption_style = find_caption_style(doc)
+    drawings: dict[str, object] = {}
     for shot in shots:
-        heading_idx = find_heading_indices(doc)
-        img_path = (args.tex.parent / shot.img_rel).resolve()
-        if not img_path.exists():
+        img_path = images[shot.img_rel]
+        if img_path is None:
             continue
 
-        key = canonical(shot.anchor)
-        start_idx = find_heading_index_fuzzy(heading_idx, key)
-        if start_idx is None:
+        end_para = end_by_anchor[shot.anchor]
+        if end_para is None:
             continue
 
-        start_para = doc.paragraphs[start_idx]
-        level = get_heading_level(start_para) or 1
-
         if shot.anchor in tail_by_anchor:
             insert_after = tail_by_anchor[shot.anchor]
         else:
-            end_idx = find_section_end_index(doc, start_idx, level)
-            insert_after = doc.paragraphs[end_idx]
-
-        img_para = insert_paragraph_after(insert_after)
-        img_para.alignment = 1
-        run = img_para.add_run()
-        run.add_picture(str(img_path), width=Inches(6.2))
-
-        cap_para = insert_paragraph_after(img_para, f"Figure {shot.number}. {shot.caption}")
-        cap_para.alignment = 1
-        for style_name in ("ImageCaption", "Caption"):
-            try:
-                cap_para.style = style_name
-                break
-            except Exception:
-                continue
+            insert_after = tail_by_end.get(end_para._p, end_para)
+
+        img_para = build_image_paragraph(insert_after._parent, img_path, drawings)
+        cap_para = build_caption_paragraph(insert_after._parent, f"Figure {shot.number}. {shot.caption}", caption_style)
+        insert_after._p.addnext(img_para._p)
+        img_para._p.addnext(cap_para._p)
 
         tail_by_anchor[shot.anchor] = cap_para
+        tail_by_end[end_para._p] = cap_para
         inserted += 1
 
     doc.save(str(out))
@@ -16,33 +16,135 @@ This script patches existing DOCX blocks and can insert missing blocks:
 from __future__ import annotations
 
 import argparse
+import bisect
 import copy
 import json
+import os
 import re
-import tempfile
-import xml.etree.ElementTree as ET
+import shutil
 import zipfile
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+# lxml keeps the original namespace prefixes and declarations (mc:Ignorable relies
+# on them); python-docx already requires it.
+from lxml import etree as ET
+
 try:
     from docx import Document
     from docx.oxml import OxmlElement
-    from docx.oxml.ns import qn
+    from docx.oxml import parse_xml as parse_oxml
+    from docx.shared import Emu
     from docx.text.paragraph import Paragraph
 except Exception:  # pragma: no cover - optional dependency for dynamic mode
     Document = None
     OxmlElement = None
-    qn = None
+    parse_oxml = None
     Paragraph = Any
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional faster JSON parser
+    orjson = None
+
 NS_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
 NS_XML = "http://www.w3.org/XML/1998/namespace"
 NS = {"w": NS_W}
+_TEXT_CMD_RE = re.compile(r"\\text[A-Za-z]+\{\}")
+_CMD_ARG_RE = re.compile(r"\\[A-Za-z]+\{([^}]*)\}")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_TEXTTT_RE = re.compile(r"\\texttt\{([^}]*)\}")
+_URL_RE = re.compile(r"\\url\{([^}]*)\}")
+_TEX_ESCAPE_RE = re.compile(r"\\([&%_$#{}])")
+_WS_RE = re.compile(r"\s+")
+_SECTION_SPLIT_RE = re.compile(r"\\(sub)?section\{([^}]+)\}")
+_ITEMIZE_RE = re.compile(r"\\begin\{itemize\}(.*?)\\end\{itemize\}", re.S)
+_ENUMERATE_RE = re.compile(r"\\begin\{enumerate\}(.*?)\\end\{enumerate\}", re.S)
+_LONGTABLE_BODY_RE = re.compile(r"\\begin\{longtable\}.*?\\endhead(.*?)\\bottomrule", re.S)
+_ITEM_RE = re.compile(r"\\item\s+(.*)")
+# A longtable row: the rest of a line that ends in "\\".
+_ROW_RE = re.compile(r"^[ \t]*(.*?)[ \t]*\\\\[ \t\r]*$", re.M)
+# A paragraph that is exactly one MANUAL_BLOCK/MANUAL_FIG marker.
+_TOKEN_RE = re.compile(r"(?:\[\[)?MANUAL_(?P<kind>BLOCK|FIG):(?P<id>[A-Za-z0-9_.:-]+)(?:\]\])?")
+_BLOCK_TOKEN_RE = re.compile(r"(?:\[\[)?MANUAL_BLOCK:([A-Za-z0-9_.:-]+)(?:\]\])?")
+
+LIST_SECTIONS = ("Scope", "Prerequisites", "Maintenance Notes")
+TABLE_SUBSECTIONS = ("Top Navigation", "Left Navigation (Common Signed-out Items)", "Home Feed Video Card")
+ENUM_SUBSECTIONS = ("Flow A: Search for a Video", "Flow B: Open a Video Watch Page")
+# Blocks ensure_missing_blocks inserts when their heading is absent.
+OPTIONAL_HEADINGS = (
+    "Left Navigation (Common Signed-out Items)",
+    "Home Feed Video Card",
+    "Flow B: Open a Video Watch Page",
+    "Maintenance Notes",
+    "Build",
+)
+
+_PARSER = ET.XMLParser(huge_tree=True)
+_P_TEXT_XP = ET.XPath(".//w:t/text()", namespaces=NS, smart_strings=False)
+_HEADING_STYLE_XP = ET.XPath("./w:pPr/w:pStyle/@w:val", namespaces=NS, smart_strings=False)
+_NUMPR_XP = ET.XPath("boolean(./w:pPr/w:numPr)", namespaces=NS)
+# numbering.xml lookups for the dynamic path.
+_ABSTRACT_NUM_XP = ET.XPath("./w:abstractNum", namespaces=NS)
+_NUM_XP = ET.XPath("./w:num", namespaces=NS)
+_LVL0_XP = ET.XPath("./w:lvl[@w:ilvl='0'][1]", namespaces=NS)
+_NUM_FMT_XP = ET.XPath("./w:numFmt[1]", namespaces=NS)
+_LVL_TEXT_XP = ET.XPath("./w:lvlText[1]", namespaces=NS)
+_ABSTRACT_NUM_ID_XP = ET.XPath("./w:abstractNumId[1]", namespaces=NS)
+_NUMPR_CHILD_XP = ET.XPath("./w:numPr", namespaces=NS)
+_TBL_CELL_RUN_XP = ET.XPath("./w:tr/w:tc/w:p/w:r", namespaces=NS)
+
+
+class _QNames(dict):
+    def __missing__(self, tag: str) -> str:
+        qname = self[tag] = f"{{{NS_W}}}{tag}"
+        return qname
+
+
+_QN = _QNames(
+    (tag, f"{{{NS_W}}}{tag}")
+    for tag in (
+        "p", "r", "t", "pPr", "pStyle", "tbl", "tr", "tc", "numPr", "ilvl", "numId", "val", "rPr",
+        "rStyle", "tab", "abstractNum", "abstractNumId", "numFmt", "num", "lvlOverride", "startOverride",
+    )
+)
+# Qualified names are built once; unlisted tags are added on first use.
+w = _QN.__getitem__
+W_P = _QN["p"]
+W_R = _QN["r"]
+W_T = _QN["t"]
+W_PPR = _QN["pPr"]
+W_TBL = _QN["tbl"]
+W_VAL = _QN["val"]
+W_ABSTRACT_NUM_ID = _QN["abstractNumId"]
+W_ILVL = _QN["ilvl"]
+W_ASCII = _QN["ascii"]
+W_HANSI = _QN["hAnsi"]
+W_LEFT = _QN["left"]
+W_HANGING = _QN["hanging"]
+W_NUM_ID = _QN["numId"]
+XML_SPACE = f"{{{NS_XML}}}space"
+
+# numId used for numbered lists when numbering.xml offers no decimal definition.
+DEFAULT_NUM_ID = "1003"
+_PRECOMPRESSED_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".jfif", ".wdp")
+_COPY_CHUNK = 1 << 20
+
 
+def w_el(tag: str) -> ET.Element:
+    # New elements declare w: themselves; the declaration is dropped again on
+    # insertion because the document root already binds the same prefix.
+    return ET.Element(w(tag), nsmap=NS)
 
-def w(tag: str) -> str:
-    return f"{{{NS_W}}}{tag}"
+
+def parse_xml(data: bytes) -> ET.Element:
+    return ET.fromstring(data, _PARSER)
+
+
+def serialize_xml(root: ET.Element) -> bytes:
+    return ET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
 
 
 def parse_args() -> argparse.Namespace:
@@ -55,74 +157,78 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
+@lru_cache(maxsize=4096)
 def canonical(text: str) -> str:
-    t = re.sub(r"\\text[A-Za-z]+\{\}", "", text)
-    t = re.sub(r"\\[A-Za-z]+\{([^}]*)\}", r"\1", t)
-    t = re.sub(r"[^a-z0-9]+", "", t.lower())
+    t = _TEXT_CMD_RE.sub("", text)
+    t = _CMD_ARG_RE.sub(r"\1", t)
+    t = _NON_ALNUM_RE.sub("", t.lower())
     return t
 
 
+@lru_cache(maxsize=4096)
 def clean_latex_text(s: str) -> str:
-    s = re.sub(r"\\texttt\{([^}]*)\}", r"\1", s)
-    s = re.sub(r"\\url\{([^}]*)\}", r"\1", s)
-    s = s.replace(r"\&", "&").replace(r"\%", "%").replace(r"\_", "_")
-    s = s.replace(r"\$", "$").replace(r"\#", "#").replace(r"\{", "{").replace(r"\}", "}")
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _TEXTTT_RE.sub(r"\1", s)
+    s = _URL_RE.sub(r"\1", s)
+    s = _TEX_ESCAPE_RE.sub(r"\1", s)
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 
-def parse_tex(tex_path: Path):
-    tex = tex_path.read_text(encoding="utf-8")
-
-    def get_itemize(section_name: str) -> list[str]:
-        pattern = rf"\\section\{{{re.escape(section_name)}\}}.*?\\begin\{{itemize\}}(.*?)\\end\{{itemize\}}"
-        m = re.search(pattern, tex, flags=re.S)
-        if not m:
-            return []
-        body = m.group(1)
-        return [clean_latex_text(x.strip()) for x in re.findall(r"\\item\s+(.*)", body)]
-
-    def get_table(subsection_name: str) -> list[list[str]]:
-        pattern = (
-            rf"\\subsection\{{{re.escape(subsection_name)}\}}.*?\\begin\{{longtable\}}.*?"
-            rf"\\endhead(.*?)\\bottomrule"
-        )
-        m = re.search(pattern, tex, flags=re.S)
-        if not m:
-            return []
-        rows: list[list[str]] = []
-        for line in m.group(1).splitlines():
-            line = line.strip()
-            if not line or not line.endswith(r"\\"):
-                continue
-            line = line[:-2].strip()
-            cells = [clean_latex_text(c.strip()) for c in line.split("&")]
-            if len(cells) >= 3:
-                rows.append(cells[:3])
+@dataclass
+class TableModel:
+    """Three-column table body stored column-wise; n is the row count."""
+
+    col0: list[str] = field(default_factory=list)
+    col1: list[str] = field(default_factory=list)
+    col2: list[str] = field(default_factory=list)
+    n: int = 0
+
+    @property
+    def columns(self) -> tuple[list[str], list[str], list[str]]:
+        return self.col0, self.col1, self.col2
+
+    def append(self, a: str, b: str, c: str) -> None:
+        self.col0.append(a)
+        self.col1.append(b)
+        self.col2.append(c)
+        self.n += 1
+
+
+def split_tex_sections(tex: str) -> dict[tuple[str, str], str]:
+    """Map ("section" | "subsection", title) to the text up to the next heading."""
+    out: dict[tuple[str, str], str] = {}
+    matches = list(_SECTION_SPLIT_RE.finditer(tex))
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(tex)
+        kind = "subsection" if m.group(1) else "section"
+        out.setdefault((kind, m.group(2)), tex[m.end() : end])
+    return out
+
+
+def tex_items(chunk: str, env_re: re.Pattern[str]) -> list[str]:
+    m = env_re.search(chunk)
+    if not m:
+        return []
+    return [clean_latex_text(x.strip()) for x in _ITEM_RE.findall(m.group(1))]
+
+
+def tex_table_rows(chunk: str) -> TableModel:
+    rows = TableModel()
+    m = _LONGTABLE_BODY_RE.search(chunk)
+    if not m:
         return rows
+    for row in _ROW_RE.finditer(m.group(1)):
+        cells = row.group(1).split("&", 3)
+        if len(cells) >= 3:
+            rows.append(*(clean_latex_text(c.strip()) for c in cells[:3]))
+    return rows
 
-    def get_enumerate(subsection_name: str) -> list[str]:
-        pattern = rf"\\subsection\{{{re.escape(subsection_name)}\}}.*?\\begin\{{enumerate\}}(.*?)\\end\{{enumerate\}}"
-        m = re.search(pattern, tex, flags=re.S)
-        if not m:
-            return []
-        body = m.group(1)
-        return [clean_latex_text(x.strip()) for x in re.findall(r"\\item\s+(.*)", body)]
-
-    lists = {
-        "Scope": get_itemize("Scope"),
-        "Prerequisites": get_itemize("Prerequisites"),
-        "Maintenance Notes": get_itemize("Maintenance Notes"),
-    }
-    tables = {
-        "Top Navigation": get_table("Top Navigation"),
-        "Left Navigation (Common Signed-out Items)": get_table("Left Navigation (Common Signed-out Items)"),
-        "Home Feed Video Card": get_table("Home Feed Video Card"),
-    }
-    enums = {
-        "Flow A: Search for a Video": get_enumerate("Flow A: Search for a Video"),
-        "Flow B: Open a Video Watch Page": get_enumerate("Flow B: Open a Video Watch Page"),
-    }
+
+def parse_tex(tex_path: Path):
+    sections = split_tex_sections(tex_path.read_text(encoding="utf-8"))
+    lists = {name: tex_items(sections.get(("section", name), ""), _ITEMIZE_RE) for name in LIST_SECTIONS}
+    tables = {name: tex_table_rows(sections.get(("subsection", name), "")) for name in TABLE_SUBSECTIONS}
+    enums = {name: tex_items(sections.get(("subsection", name), ""), _ENUMERATE_RE) for name in ENUM_SUBSECTIONS}
     build_lines = [
         "Run this command in the same directory:",
         "latexmk -pdf main.tex",
@@ -132,88 +238,194 @@ def parse_tex(tex_path: Path):
 
 
 def paragraph_text(p: ET.Element) -> str:
-    return "".join((t.text or "") for t in p.findall(".//w:t", NS)).strip()
+    return "".join(_P_TEXT_XP(p)).strip()
 
 
 def is_heading_paragraph(p: ET.Element) -> bool:
-    style = p.find("./w:pPr/w:pStyle", NS)
-    if style is None:
-        return False
-    val = style.attrib.get(w("val"), "")
-    return val.startswith("Heading")
+    vals = _HEADING_STYLE_XP(p)
+    return bool(vals) and vals[0].startswith("Heading")
 
 
 def is_list_paragraph(p: ET.Element) -> bool:
-    return p.find("./w:pPr/w:numPr", NS) is not None
+    return _NUMPR_XP(p)
+
+
+def paragraph_text_cached(p: ET.Element, cache: dict[tuple[ET.Element, str], Any]) -> str:
+    key = (p, "text")
+    if key not in cache:
+        cache[key] = paragraph_text(p)
+    return cache[key]
+
+
+def is_heading_cached(p: ET.Element, cache: dict[tuple[ET.Element, str], Any]) -> bool:
+    key = (p, "heading")
+    if key not in cache:
+        cache[key] = is_heading_paragraph(p)
+    return cache[key]
+
 
+def bust_cache(cache: dict[tuple[ET.Element, str], Any] | None, p: ET.Element) -> None:
+    if cache is not None:
+        cache.pop((p, "text"), None)
+        cache.pop((p, "heading"), None)
 
-def set_paragraph_text(p: ET.Element, text: str) -> None:
+
+def set_paragraph_text(p: ET.Element, text: str, cache: dict[tuple[ET.Element, str], Any] | None = None) -> None:
+    bust_cache(cache, p)
     ppr = p.find("./w:pPr", NS)
-    for child in list(p):
-        if child.tag != w("pPr"):
-            p.remove(child)
-    r = ET.Element(w("r"))
-    t = ET.SubElement(r, w("t"))
+    r = w_el("r")
+    t = ET.SubElement(r, W_T)
     if text.startswith(" ") or text.endswith(" ") or "  " in text:
-        t.set(f"{{{NS_XML}}}space", "preserve")
+        t.set(XML_SPACE, "preserve")
     t.text = text
-    if ppr is None:
-        p.insert(0, r)
-    else:
-        p.append(r)
+    p[:] = [r] if ppr is None else [ppr, r]
 
 
-def top_level_heading_map(body: ET.Element) -> dict[str, int]:
-    out: dict[str, int] = {}
-    children = list(body)
-    for i, el in enumerate(children):
-        if el.tag != w("p"):
-            continue
-        if not is_heading_paragraph(el):
-            continue
-        txt = paragraph_text(el)
-        if txt:
-            out[canonical(txt)] = i
-    return out
+def paragraph_prototype(template: ET.Element) -> ET.Element:
+    """Copy of template with only its pPr, ready to take new text."""
+    p = copy.deepcopy(template)
+    ppr = p.find("./w:pPr", NS)
+    p[:] = [] if ppr is None else [ppr]
+    return p
 
 
-def find_heading_index(body: ET.Element, heading: str) -> int | None:
-    cmap = top_level_heading_map(body)
-    target = canonical(heading)
-    if target in cmap:
-        return cmap[target]
-    for k, v in cmap.items():
-        if target in k or k in target:
-            return v
-    return None
+class BodyIndex:
+    """Heading positions of ``w:body`` children, rebuilt lazily after edits."""
 
+    def __init__(self, body: ET.Element) -> None:
+        self.body = body
+        self.dirty = True
+        self._children: list[ET.Element] = []
+        self.heading_pos: dict[str, int] = {}
+        self.heading_starts: list[int] = []
+        self.cache: dict[tuple[ET.Element, str], Any] = {}
+        self.prototypes: dict[ET.Element, ET.Element] = {}
 
-def find_first_list_template(body: ET.Element) -> ET.Element | None:
-    for el in list(body):
-        if el.tag == w("p") and is_list_paragraph(el):
+    def invalidate(self) -> None:
+        self.dirty = True
+
+    def _rebuild(self) -> None:
+        self._children = list(self.body)
+        self.heading_pos = {}
+        self.heading_starts = []
+        for i, el in enumerate(self._children):
+            if el.tag != W_P or not is_heading_cached(el, self.cache):
+                continue
+            self.heading_starts.append(i)
+            txt = paragraph_text_cached(el, self.cache)
+            if txt:
+                self.heading_pos[canonical(txt)] = i
+        self.dirty = False
+
+    def _ensure(self) -> None:
+        if self.dirty:
+            self._rebuild()
+
+    @property
+    def children(self) -> list[ET.Element]:
+        self._ensure()
+        return self._children
+
+    def heading_map(self) -> dict[str, int]:
+        self._ensure()
+        return self.heading_pos
+
+    def heading_index(self, heading: str) -> int | None:
+        self._ensure()
+        target = canonical(heading)
+        if target in self.heading_pos:
+            return self.heading_pos[target]
+        for k, v in self.heading_pos.items():
+            if target in k or k in target:
+                return v
+        return None
+
+    def section_end(self, start_idx: int) -> int:
+        self._ensure()
+        pos = bisect.bisect_right(self.heading_starts, start_idx)
+        if pos < len(self.heading_starts):
+            return self.heading_starts[pos]
+        return len(self._children)
+
+    def insert(self, pos: int, el: ET.Element) -> None:
+        self.body.insert(pos, el)
+        self.dirty = True
+
+    def remove(self, el: ET.Element) -> None:
+        self.body.remove(el)
+        self.dirty = True
+
+
+class BodyEditor:
+    """Queues inserts/removals against one snapshot of the body and applies them in a single assignment."""
+
+    def __init__(self, index: BodyIndex) -> None:
+        self.index = index
+        self.children = index.children
+        self.ops: list[tuple[int, str, ET.Element]] = []
+
+    def insert_after(self, idx: int, elems: list[ET.Element]) -> None:
+        for el in elems:
+            self.ops.append((idx + 1, "insert", el))
+
+    def remove(self, idx: int) -> None:
+        self.ops.append((idx, "remove", self.children[idx]))
+
+    def apply(self) -> None:
+        if not self.ops:
+            return
+        inserts: dict[int, list[ET.Element]] = {}
+        removed: set[int] = set()
+        for idx, op, el in self.ops:
+            if op == "insert":
+                inserts.setdefault(idx, []).append(el)
+            else:
+                removed.add(idx)
+        new_children: list[ET.Element] = []
+        for i, el in enumerate(self.children):
+            new_children.extend(inserts.get(i, ()))
+            if i not in removed:
+                new_children.append(el)
+        new_children.extend(inserts.get(len(self.children), ()))
+        self.index.body[:] = new_children
+        self.index.invalidate()
+        self.ops = []
+
+
+def top_level_heading_map(index: BodyIndex) -> dict[str, int]:
+    return index.heading_map()
+
+
+def find_heading_index(index: BodyIndex, heading: str) -> int | None:
+    return index.heading_index(heading)
+
+
+def find_first_list_template(index: BodyIndex) -> ET.Element | None:
+    for el in index.children:
+        if el.tag == W_P and is_list_paragraph(el):
             return el
     return None
 
 
-def find_list_template_under_heading(body: ET.Element, heading: str) -> ET.Element | None:
-    idx = find_heading_index(body, heading)
+def find_list_template_under_heading(index: BodyIndex, heading: str) -> ET.Element | None:
+    idx = find_heading_index(index, heading)
     if idx is None:
         return None
-    children = list(body)
+    children = index.children
     for j in range(idx + 1, len(children)):
         el = children[j]
-        if el.tag == w("p") and is_heading_paragraph(el):
+        if el.tag == W_P and is_heading_cached(el, index.cache):
             break
-        if el.tag == w("p") and is_list_paragraph(el):
+        if el.tag == W_P and is_list_paragraph(el):
             return el
     return None
 
 
 def make_heading(text: str, level: int) -> ET.Element:
-    p = ET.Element(w("p"))
-    ppr = ET.SubElement(p, w("pPr"))
+    p = w_el("p")
+    ppr = ET.SubElement(p, W_PPR)
     ps = ET.SubElement(ppr, w("pStyle"))
-    ps.set(w("val"), f"Heading{level}")
+    ps.set(W_VAL, f"Heading{level}")
     set_paragraph_text(p, text)
     return p
 
@@ -221,22 +433,22 @@ def make_heading(text: str, level: int) -> ET.Element:
 def heading_template(body: ET.Element, level: int) -> ET.Element | None:
     target_style = f"Heading{level}"
     for p in list(body):
-        if p.tag != w("p"):
+        if p.tag != W_P:
             continue
         st = p.find("./w:pPr/w:pStyle", NS)
-        if st is None or st.attrib.get(w("val"), "") != target_style:
+        if st is None or st.attrib.get(W_VAL, "") != target_style:
             continue
         # Prefer templates that already contain SectionNumber run.
         for r in p.findall("./w:r", NS):
             rs = r.find("./w:rPr/w:rStyle", NS)
-            if rs is not None and rs.attrib.get(w("val"), "") == "SectionNumber":
+            if rs is not None and rs.attrib.get(W_VAL, "") == "SectionNumber":
                 return p
     # fallback: any heading style paragraph
     for p in list(body):
-        if p.tag != w("p"):
+        if p.tag != W_P:
             continue
         st = p.find("./w:pPr/w:pStyle", NS)
-        if st is not None and st.attrib.get(w("val"), "") == target_style:
+        if st is not None and st.attrib.get(W_VAL, "") == target_style:
             return p
     return None
 
@@ -248,111 +460,114 @@ def make_heading_like_template(body: ET.Element, text: str, level: int) -> ET.El
 
     p = copy.deepcopy(tpl)
     # Keep SectionNumber run and tab run; replace remaining text runs with our heading text.
-    for r in list(p.findall("./w:r", NS)):
-        keep = False
-        rs = r.find("./w:rPr/w:rStyle", NS)
-        if rs is not None and rs.attrib.get(w("val"), "") == "SectionNumber":
-            keep = True
-        if r.find("./w:tab", NS) is not None:
-            keep = True
-        if not keep:
-            p.remove(r)
-
-    new_r = ET.Element(w("r"))
-    t = ET.SubElement(new_r, w("t"))
+    def keep(c: ET.Element) -> bool:
+        if c.tag != W_R:
+            return True
+        rs = c.find("./w:rPr/w:rStyle", NS)
+        if rs is not None and rs.attrib.get(W_VAL, "") == "SectionNumber":
+            return True
+        return c.find("./w:tab", NS) is not None
+
+    p[:] = [c for c in p if keep(c)]
+
+    new_r = w_el("r")
+    t = ET.SubElement(new_r, W_T)
     t.text = f" {text}"
     p.append(new_r)
     return p
 
 
-def clone_list_paragraph_with_text(template: ET.Element, text: str) -> ET.Element:
-    p = copy.deepcopy(template)
+def clone_list_paragraph_with_text(
+    template: ET.Element,
+    text: str,
+    prototypes: dict[ET.Element, ET.Element] | None = None,
+) -> ET.Element:
+    if prototypes is None:
+        p = paragraph_prototype(template)
+    else:
+        proto = prototypes.get(template)
+        if proto is None:
+            proto = prototypes[template] = paragraph_prototype(template)
+        p = copy.deepcopy(proto)
     set_paragraph_text(p, text)
     return p
 
 
 def make_list_number_paragraph(text: str, num_id: str) -> ET.Element:
-    p = ET.Element(w("p"))
-    ppr = ET.SubElement(p, w("pPr"))
+    p = w_el("p")
+    ppr = ET.SubElement(p, W_PPR)
     numpr = ET.SubElement(ppr, w("numPr"))
     ilvl = ET.SubElement(numpr, w("ilvl"))
-    ilvl.set(w("val"), "0")
+    ilvl.set(W_VAL, "0")
     numid = ET.SubElement(numpr, w("numId"))
-    numid.set(w("val"), str(num_id))
+    numid.set(W_VAL, str(num_id))
     set_paragraph_text(p, text)
     return p
 
 
 def prepare_decimal_num_ids(docx_path: Path) -> tuple[str, str, bytes | None]:
-    default = "1003"
+    default = DEFAULT_NUM_ID
     try:
         with zipfile.ZipFile(docx_path, "r") as zf:
             if "word/numbering.xml" not in zf.namelist():
                 return default, default, None
             num_xml = zf.read("word/numbering.xml")
-            num_root = ET.fromstring(num_xml)
+        # No decimal abstractNum anywhere means nothing to pick; skip the parse.
+        if b"decimal" not in num_xml:
+            return default, default, None
+        num_root = parse_xml(num_xml)
     except Exception:
         return default, default, None
 
     abstract_fmt: dict[str, str] = {}
-    for absn in num_root.findall(".//w:abstractNum", NS):
+    for absn in num_root.iterfind(".//w:abstractNum", NS):
         aid = absn.attrib.get(w("abstractNumId"), "")
         fmt = absn.find(".//w:numFmt", NS)
         if aid and fmt is not None:
-            abstract_fmt[aid] = fmt.attrib.get(w("val"), "")
+            abstract_fmt[aid] = fmt.attrib.get(W_VAL, "")
 
-    decimal_nums: list[tuple[str, str]] = []
-    for num in num_root.findall(".//w:num", NS):
+    # One walk over <w:num> collects both the decimal candidates and the used ids.
+    decimal_nums: list[tuple[str, str, ET.Element]] = []
+    existing_ids: list[int] = []
+    for num in num_root.iterfind(".//w:num", NS):
         nid = num.attrib.get(w("numId"), "")
+        if nid.isdigit():
+            existing_ids.append(int(nid))
         absid = num.find("./w:abstractNumId", NS)
-        aid = absid.attrib.get(w("val"), "") if absid is not None else ""
+        aid = absid.attrib.get(W_VAL, "") if absid is not None else ""
         if nid and abstract_fmt.get(aid) == "decimal":
-            decimal_nums.append((nid, aid))
+            decimal_nums.append((nid, aid, num))
 
     if not decimal_nums:
         return default, default, None
 
-    flow_a_num, flow_a_abs = decimal_nums[0]
+    flow_a_num, flow_a_abs, _ = decimal_nums[0]
     if len(decimal_nums) >= 2:
-        flow_b_num = decimal_nums[1][0]
+        flow_b_num, _, flow_b_el = decimal_nums[1]
         # Force restart at 1 for flow B numbering sequence.
-        updated = ensure_num_start_override(num_root, flow_b_num)
-        new_xml = ET.tostring(num_root, encoding="utf-8", xml_declaration=True) if updated else None
+        updated = ensure_num_start_override(flow_b_el)
+        new_xml = serialize_xml(num_root) if updated else None
         return flow_a_num, flow_b_num, new_xml
 
     # Create a second decimal num id that shares same abstract decimal definition.
-    existing_ids: list[int] = []
-    for num in num_root.findall(".//w:num", NS):
-        nid = num.attrib.get(w("numId"), "")
-        if nid.isdigit():
-            existing_ids.append(int(nid))
     new_id = str((max(existing_ids) + 1) if existing_ids else 2000)
 
-    new_num = ET.Element(w("num"))
+    new_num = w_el("num")
     new_num.set(w("numId"), new_id)
     abs_elem = ET.SubElement(new_num, w("abstractNumId"))
-    abs_elem.set(w("val"), flow_a_abs)
+    abs_elem.set(W_VAL, flow_a_abs)
     lvl_ovr = ET.SubElement(new_num, w("lvlOverride"))
     lvl_ovr.set(w("ilvl"), "0")
     start_ovr = ET.SubElement(lvl_ovr, w("startOverride"))
-    start_ovr.set(w("val"), "1")
+    start_ovr.set(W_VAL, "1")
     num_root.append(new_num)
 
-    new_xml = ET.tostring(num_root, encoding="utf-8", xml_declaration=True)
+    new_xml = serialize_xml(num_root)
     return flow_a_num, new_id, new_xml
 
 
-def ensure_num_start_override(num_root: ET.Element, num_id: str) -> bool:
+def ensure_num_start_override(target: ET.Element) -> bool:
     changed = False
-    target = None
-    for num in num_root.findall(".//w:num", NS):
-        nid = num.attrib.get(w("numId"), "")
-        if nid == str(num_id):
-            target = num
-            break
-    if target is None:
-        return False
-
     lvl = None
     for lo in target.findall("./w:lvlOverride", NS):
         if lo.attrib.get(w("ilvl"), "") == "0":
@@ -367,8 +582,8 @@ def ensure_num_start_override(num_root: ET.Element, num_id: str) -> bool:
     if start is None:
         start = ET.SubElement(lvl, w("startOverride"))
         changed = True
-    if start.attrib.get(w("val")) != "1":
-        start.set(w("val"), "1")
+    if start.attrib.get(W_VAL) != "1":
+        start.set(W_VAL, "1")
         changed = True
     return changed
 
@@ -377,34 +592,45 @@ def table_rows(tbl: ET.Element) -> list[ET.Element]:
     return [tr for tr in tbl.findall("./w:tr", NS)]
 
 
-def set_cell_text(cell: ET.Element, text: str) -> None:
+def set_cell_text(cell: ET.Element, text: str, cache: dict[tuple[ET.Element, str], Any] | None = None) -> None:
+    bust_cache(cache, cell)
     p = cell.find("./w:p", NS)
     if p is None:
-        p = ET.SubElement(cell, w("p"))
-    set_paragraph_text(p, text)
+        p = ET.SubElement(cell, W_P)
+    set_paragraph_text(p, text, cache)
 
 
-def build_table_from_template(template_tbl: ET.Element, rows: list[list[str]]) -> ET.Element:
-    tbl = copy.deepcopy(template_tbl)
-    trs = table_rows(tbl)
+def build_table_from_template(template_tbl: ET.Element, rows: TableModel) -> ET.Element:
+    trs = table_rows(template_tbl)
     if len(trs) < 2:
-        return tbl
-    header = trs[0]
-    data_template = trs[1]
-    for tr in trs[1:]:
-        tbl.remove(tr)
-    for row in rows:
+        return copy.deepcopy(template_tbl)
+    # Copy the table without its data rows instead of copying and then deleting them.
+    data_trs = set(trs[1:])
+    tbl = w_el("tbl")
+    tbl.attrib.update(template_tbl.attrib)
+    tbl.text, tbl.tail = template_tbl.text, template_tbl.tail
+    tbl.extend(copy.deepcopy(el) for el in template_tbl if el not in data_trs)
+    # Data rows are cloned from one prototype whose first three cells are already emptied.
+    data_template = copy.deepcopy(trs[1])
+    for tc in data_template.findall("./w:tc", NS)[:3]:
+        cell_p = tc.find("./w:p", NS)
+        if cell_p is not None:
+            ppr = cell_p.find("./w:pPr", NS)
+            cell_p[:] = [] if ppr is None else [ppr]
+    row_cells: list[list[ET.Element]] = []
+    for _ in range(rows.n):
         tr = copy.deepcopy(data_template)
-        tcs = tr.findall("./w:tc", NS)
-        for i in range(min(3, len(tcs))):
-            set_cell_text(tcs[i], row[i] if i < len(row) else "")
+        row_cells.append(tr.findall("./w:tc", NS))
         tbl.append(tr)
-    _ = header
+    for c, col in enumerate(rows.columns):
+        for tcs, txt in zip(row_cells, col):
+            if c < len(tcs):
+                set_cell_text(tcs[c], txt)
     return tbl
 
 
-def build_table_with_header(template_tbl: ET.Element, header_cells: list[str], rows: list[list[str]]) -> ET.Element:
-    tbl = build_table_from_template(template_tbl, rows if rows else [["", "", ""]])
+def build_table_with_header(template_tbl: ET.Element, header_cells: list[str], rows: TableModel) -> ET.Element:
+    tbl = build_table_from_template(template_tbl, rows if rows.n else TableModel([""], [""], [""], 1))
     trs = table_rows(tbl)
     if not trs:
         return tbl
@@ -415,38 +641,32 @@ def build_table_with_header(template_tbl: ET.Element, header_cells: list[str], r
     return tbl
 
 
-def insert_after_index(body: ET.Element, idx: int, elems: list[ET.Element]) -> None:
+def insert_after_index(index: BodyIndex, idx: int, elems: list[ET.Element]) -> None:
     pos = idx + 1
     for el in elems:
-        body.insert(pos, el)
+        index.body.insert(pos, el)
         pos += 1
+    index.invalidate()
 
 
-def section_end_index(body: ET.Element, start_idx: int) -> int:
-    children = list(body)
-    i = start_idx + 1
-    while i < len(children):
-        el = children[i]
-        if el.tag == w("p") and is_heading_paragraph(el):
-            return i
-        i += 1
-    return len(children)
+def section_end_index(index: BodyIndex, start_idx: int) -> int:
+    return index.section_end(start_idx)
 
 
-def normalize_heading_manual_numbers(body: ET.Element) -> int:
+def normalize_heading_manual_numbers(index: BodyIndex) -> int:
     """
     Remove manually typed number prefixes in heading text runs and keep only
     Word numbering (if present).
     """
     changed = 0
-    for p in list(body):
-        if p.tag != w("p") or not is_heading_paragraph(p):
+    for p in index.children:
+        if p.tag != W_P or not is_heading_cached(p, index.cache):
             continue
         saw_section_number = False
         for r in p.findall("./w:r", NS):
             rstyle = r.find("./w:rPr/w:rStyle", NS)
             is_section_number = (
-                rstyle is not None and rstyle.attrib.get(w("val"), "") == "SectionNumber"
+                rstyle is not None and rstyle.attrib.get(W_VAL, "") == "SectionNumber"
             )
             if is_section_number:
                 saw_section_number = True
@@ -463,41 +683,72 @@ def normalize_heading_manual_numbers(body: ET.Element) -> int:
                 new = " " + new
             if new != raw:
                 t.text = new
+                bust_cache(index.cache, p)
                 changed += 1
             break
+    if changed:
+        index.invalidate()
     return changed
 
 
-def set_heading_number_and_title(p: ET.Element, level: int, number_text: str, title_text: str) -> None:
+def set_heading_number_and_title(
+    p: ET.Element,
+    level: int,
+    number_text: str,
+    title_text: str,
+    cache: dict[tuple[ET.Element, str], Any] | None = None,
+) -> None:
+    bust_cache(cache, p)
     # Ensure heading style
     ppr = p.find("./w:pPr", NS)
     if ppr is None:
-        ppr = ET.SubElement(p, w("pPr"))
+        ppr = ET.SubElement(p, W_PPR)
     pstyle = ppr.find("./w:pStyle", NS)
     if pstyle is None:
         pstyle = ET.SubElement(ppr, w("pStyle"))
-    pstyle.set(w("val"), f"Heading{level}")
+    pstyle.set(W_VAL, f"Heading{level}")
 
     # Replace runs with: [SectionNumber][tab][title]
-    for r in list(p.findall("./w:r", NS)):
-        p.remove(r)
+    p[:] = [c for c in p if c.tag != W_R]
 
-    r_num = ET.SubElement(p, w("r"))
+    r_num = ET.SubElement(p, W_R)
     rpr = ET.SubElement(r_num, w("rPr"))
     rs = ET.SubElement(rpr, w("rStyle"))
-    rs.set(w("val"), "SectionNumber")
-    t_num = ET.SubElement(r_num, w("t"))
+    rs.set(W_VAL, "SectionNumber")
+    t_num = ET.SubElement(r_num, W_T)
     t_num.text = number_text
 
-    r_tab = ET.SubElement(p, w("r"))
+    r_tab = ET.SubElement(p, W_R)
     ET.SubElement(r_tab, w("tab"))
 
-    r_title = ET.SubElement(p, w("r"))
-    t_title = ET.SubElement(r_title, w("t"))
+    r_title = ET.SubElement(p, W_R)
+    t_title = ET.SubElement(r_title, W_T)
     t_title.text = title_text
 
 
-def enforce_heading_numbers(body: ET.Element) -> int:
+def element_shape(el: ET.Element) -> tuple:
+    # Tag, attributes, text and children; indentation-only text does not count.
+    text = el.text if el.tag == W_T else (el.text or "").strip()
+    return el.tag, dict(el.attrib), text, [element_shape(c) for c in el]
+
+
+def heading_has_number(p: ET.Element, level: int, number_text: str, title_text: str) -> bool:
+    """True when set_heading_number_and_title would leave p as it is."""
+    pstyle = p.find("./w:pPr/w:pStyle", NS)
+    if pstyle is None or pstyle.attrib.get(W_VAL) != f"Heading{level}":
+        return False
+    runs = [c for c in p if c.tag == W_R]
+    if len(runs) != 3 or list(p)[-3:] != runs:
+        return False
+    expected = [
+        (W_R, {}, "", [(w("rPr"), {}, "", [(w("rStyle"), {W_VAL: "SectionNumber"}, "", [])]), (W_T, {}, number_text, [])]),
+        (W_R, {}, "", [(w("tab"), {}, "", [])]),
+        (W_R, {}, "", [(W_T, {}, title_text, [])]),
+    ]
+    return [element_shape(r) for r in runs] == expected
+
+
+def enforce_heading_numbers(index: BodyIndex) -> int:
     changed = 0
     targets = [
         ("Scope", 1, "1"),
@@ -515,20 +766,23 @@ def enforce_heading_numbers(body: ET.Element) -> int:
     ]
 
     for title, level, num in targets:
-        idx = find_heading_index(body, title)
+        idx = find_heading_index(index, title)
         if idx is None:
             continue
-        p = list(body)[idx]
-        before = paragraph_text(p)
-        set_heading_number_and_title(p, level, num, title)
-        after = paragraph_text(p)
+        p = index.children[idx]
+        if heading_has_number(p, level, num, title):
+            continue
+        before = paragraph_text_cached(p, index.cache)
+        set_heading_number_and_title(p, level, num, title, index.cache)
+        after = paragraph_text_cached(p, index.cache)
         if before != after:
             changed += 1
+            index.invalidate()
     return changed
 
 
 def enforce_section_lists_and_build(
-    body: ET.Element,
+    index: BodyIndex,
     lists: dict[str, list[str]],
     enums: dict[str, list[str]],
     build_lines: list[str],
@@ -536,12 +790,19 @@ def enforce_section_lists_and_build(
     flow_b_num_id: str,
 ) -> int:
     changed = 0
-    children = list(body)
-    bullet_tpl = find_first_list_template(body)
-    enum_tpl = find_list_template_under_heading(body, "Flow A: Search for a Video")
+    bullet_tpl = find_first_list_template(index)
+    enum_tpl = find_list_template_under_heading(index, "Flow A: Search for a Video")
     if enum_tpl is None:
         enum_tpl = bullet_tpl
 
+    # Resolve each heading once; the passes below only add or drop body
+    # paragraphs, so the elements stay valid and are located by identity.
+    heading_els: dict[str, ET.Element] = {}
+    for title in ("Flow A: Search for a Video", "Flow B: Open a Video Watch Page", "Maintenance Notes", "Build"):
+        idx = find_heading_index(index, title)
+        if idx is not None:
+            heading_els[title] = index.children[idx]
+
     def rewrite_list_section(
         heading: str,
         items: list[str],
@@ -550,20 +811,19 @@ def enforce_section_lists_and_build(
         number_num_id: str = "",
     ):
         nonlocal changed
-        if template is None:
+        if template is None or heading not in heading_els:
             return
-        hi = find_heading_index(body, heading)
-        if hi is None:
-            return
-        end = section_end_index(body, hi)
-        cur = list(body)
+        hi = index.children.index(heading_els[heading])
+        end = section_end_index(index, hi)
+        editor = BodyEditor(index)
         # remove existing list paragraphs in this section
-        for el in cur[hi + 1 : end]:
-            if el.tag == w("p") and is_list_paragraph(el):
-                body.remove(el)
+        for j in range(hi + 1, end):
+            el = editor.children[j]
+            if el.tag == W_P and is_list_paragraph(el):
+                editor.remove(j)
                 changed += 1
-            elif el.tag == w("p"):
-                t = paragraph_text(el).strip()
+            elif el.tag == W_P:
+                t = paragraph_text_cached(el, index.cache).strip()
                 # Clean legacy plain-text numbered bullets from previous sync mode.
                 if t:
                     legacy_match = False
@@ -572,21 +832,19 @@ def enforce_section_lists_and_build(
                             legacy_match = True
                             break
                     if legacy_match:
-                        body.remove(el)
+                        editor.remove(j)
                         changed += 1
         # insert desired items right after heading
-        insert_idx = find_heading_index(body, heading)
-        if insert_idx is None:
-            return
         if numbered:
             elems = []
             for t in items:
                 elems.append(make_list_number_paragraph(t, number_num_id))
         else:
-            elems = [clone_list_paragraph_with_text(template, t) for t in items]
+            elems = [clone_list_paragraph_with_text(template, t, index.prototypes) for t in items]
         if elems:
-            insert_after_index(body, insert_idx, elems)
+            editor.insert_after(hi, elems)
             changed += len(elems)
+        editor.apply()
 
     rewrite_list_section(
         "Flow A: Search for a Video",
@@ -605,41 +863,40 @@ def enforce_section_lists_and_build(
     rewrite_list_section("Maintenance Notes", lists.get("Maintenance Notes", []), bullet_tpl)
 
     # Force Build section text to match LaTeX intent.
-    build_idx = find_heading_index(body, "Build")
-    if build_idx is not None:
-        end = section_end_index(body, build_idx)
-        cur = list(body)
-        for el in cur[build_idx + 1 : end]:
-            body.remove(el)
+    if "Build" in heading_els:
+        build_idx = index.children.index(heading_els["Build"])
+        end = section_end_index(index, build_idx)
+        editor = BodyEditor(index)
+        for j in range(build_idx + 1, end):
+            editor.remove(j)
             changed += 1
-        insert_idx = find_heading_index(body, "Build")
-        if insert_idx is not None:
-            elems: list[ET.Element] = []
-            for line in build_lines:
-                p = ET.Element(w("p"))
-                set_paragraph_text(p, line)
-                elems.append(p)
-            insert_after_index(body, insert_idx, elems)
-            changed += len(elems)
+        elems: list[ET.Element] = []
+        for line in build_lines:
+            p = w_el("p")
+            set_paragraph_text(p, line)
+            elems.append(p)
+        editor.insert_after(build_idx, elems)
+        changed += len(elems)
+        editor.apply()
 
     return changed
 
 
-def sync_list_under_heading(body: ET.Element, heading: str, items: list[str]) -> int:
+def sync_list_under_heading(index: BodyIndex, heading: str, items: list[str]) -> int:
     if not items:
         return 0
-    idx = find_heading_index(body, heading)
+    idx = find_heading_index(index, heading)
     if idx is None:
         return 0
 
-    children = list(body)
+    children = index.children
     j = idx + 1
     list_idxs: list[int] = []
     while j < len(children):
         el = children[j]
-        if el.tag == w("p") and is_heading_paragraph(el):
+        if el.tag == W_P and is_heading_cached(el, index.cache):
             break
-        if el.tag == w("p") and is_list_paragraph(el):
+        if el.tag == W_P and is_list_paragraph(el):
             list_idxs.append(j)
         elif list_idxs:
             break
@@ -649,41 +906,35 @@ def sync_list_under_heading(body: ET.Element, heading: str, items: list[str]) ->
         return 0
 
     changed = 0
-    template = children[list_idxs[0]]
-
-    while len(list_idxs) < len(items):
-        insert_at = list_idxs[-1] + 1
-        body.insert(insert_at, copy.deepcopy(template))
-        children = list(body)
-        list_idxs = list(range(list_idxs[0], list_idxs[0] + len(items)))
-
-    while len(list_idxs) > len(items):
-        rm_idx = list_idxs.pop()
-        body.remove(children[rm_idx])
-        children = list(body)
-
-    for i, txt in enumerate(items):
-        p = children[list_idxs[i]]
+    first, last = list_idxs[0], list_idxs[-1]
+    existing = children[first : last + 1]
+    paras = existing[: len(items)]
+    paras.extend(copy.deepcopy(existing[0]) for _ in range(len(items) - len(existing)))
+    if len(paras) != len(existing):
+        index.body[first : last + 1] = paras
+        index.invalidate()
+
+    for p, txt in zip(paras, items):
         if paragraph_text(p) != txt:
-            set_paragraph_text(p, txt)
+            set_paragraph_text(p, txt, index.cache)
             changed += 1
     return changed
 
 
-def sync_table_under_heading(body: ET.Element, heading: str, rows: list[list[str]]) -> int:
-    if not rows:
+def sync_table_under_heading(index: BodyIndex, heading: str, rows: TableModel) -> int:
+    if not rows.n:
         return 0
-    idx = find_heading_index(body, heading)
+    idx = find_heading_index(index, heading)
     if idx is None:
         return 0
 
-    children = list(body)
+    children = index.children
     t_idx = None
     for j in range(idx + 1, len(children)):
-        if children[j].tag == w("tbl"):
+        if children[j].tag == W_TBL:
             t_idx = j
             break
-        if children[j].tag == w("p") and is_heading_paragraph(children[j]):
+        if children[j].tag == W_P and is_heading_cached(children[j], index.cache):
             break
     if t_idx is None:
         return 0
@@ -694,351 +945,491 @@ def sync_table_under_heading(body: ET.Element, heading: str, rows: list[list[str
         return 0
 
     data_rows = trs[1:]
-    template = data_rows[0]
     changed = 0
 
-    while len(data_rows) < len(rows):
-        table.append(copy.deepcopy(template))
-        data_rows = table_rows(table)[1:]
-
-    while len(data_rows) > len(rows):
-        table.remove(data_rows[-1])
-        data_rows = table_rows(table)[1:]
-
-    for r_idx, row in enumerate(rows):
-        tr = data_rows[r_idx]
-        tcs = tr.findall("./w:tc", NS)
-        for c in range(min(3, len(tcs))):
-            if paragraph_text(tcs[c]) != row[c]:
-                set_cell_text(tcs[c], row[c])
+    need = rows.n - len(data_rows)
+    if need > 0:
+        clones = [copy.deepcopy(data_rows[0]) for _ in range(need)]
+        table.extend(clones)
+        data_rows.extend(clones)
+    elif need < 0:
+        drop = set(data_rows[rows.n :])
+        table[:] = [el for el in table if el not in drop]
+        del data_rows[rows.n :]
+
+    row_cells = [tr.findall("./w:tc", NS) for tr in data_rows]
+    for c, col in enumerate(rows.columns):
+        for tcs, txt in zip(row_cells, col):
+            if c < len(tcs) and paragraph_text(tcs[c]) != txt:
+                set_cell_text(tcs[c], txt, index.cache)
                 changed += 1
     return changed
 
 
-def ensure_missing_blocks(body: ET.Element, lists: dict[str, list[str]], tables: dict[str, list[list[str]]], enums: dict[str, list[str]]) -> int:
+def ensure_missing_blocks(index: BodyIndex, lists: dict[str, list[str]], tables: dict[str, TableModel], enums: dict[str, list[str]]) -> int:
     changed = 0
-    list_tpl = find_first_list_template(body)
-    enum_tpl = find_list_template_under_heading(body, "Flow A: Search for a Video")
+    # These are the only blocks this pass can add; when all exist it is a no-op.
+    if all(find_heading_index(index, h) is not None for h in OPTIONAL_HEADINGS):
+        return 0
+    list_tpl = find_first_list_template(index)
+    enum_tpl = find_list_template_under_heading(index, "Flow A: Search for a Video")
     if enum_tpl is None:
         enum_tpl = list_tpl
 
     table_tpl = None
-    for el in list(body):
-        if el.tag == w("tbl"):
+    for el in index.children:
+        if el.tag == W_TBL:
             table_tpl = el
             break
 
     # Add missing link subsections
-    top_nav_idx = find_heading_index(body, "Top Navigation")
-    left_idx = find_heading_index(body, "Left Navigation (Common Signed-out Items)")
-    video_idx = find_heading_index(body, "Home Feed Video Card")
+    top_nav_idx = find_heading_index(index, "Top Navigation")
+    left_idx = find_heading_index(index, "Left Navigation (Common Signed-out Items)")
+    video_idx = find_heading_index(index, "Home Feed Video Card")
     if top_nav_idx is not None and table_tpl is not None:
         if left_idx is None:
             insert_after_index(
-                body,
+                index,
                 top_nav_idx,
                 [
-                    make_heading_like_template(body, "Left Navigation (Common Signed-out Items)", 2),
-                    build_table_from_template(table_tpl, tables.get("Left Navigation (Common Signed-out Items)", [])),
+                    make_heading_like_template(index.body, "Left Navigation (Common Signed-out Items)", 2),
+                    build_table_from_template(table_tpl, tables.get("Left Navigation (Common Signed-out Items)", TableModel())),
                 ],
             )
             changed += 1
-            left_idx = find_heading_index(body, "Left Navigation (Common Signed-out Items)")
+            left_idx = find_heading_index(index, "Left Navigation (Common Signed-out Items)")
         if video_idx is None and left_idx is not None:
             insert_after_index(
-                body,
+                index,
                 left_idx,
                 [
-                    make_heading_like_template(body, "Home Feed Video Card", 2),
-                    build_table_from_template(table_tpl, tables.get("Home Feed Video Card", [])),
+                    make_heading_like_template(index.body, "Home Feed Video Card", 2),
+                    build_table_from_template(table_tpl, tables.get("Home Feed Video Card", TableModel())),
                 ],
             )
             changed += 1
 
     # Add missing Flow B subsection
-    flow_a_idx = find_heading_index(body, "Flow A: Search for a Video")
-    flow_b_idx = find_heading_index(body, "Flow B: Open a Video Watch Page")
+    flow_a_idx = find_heading_index(index, "Flow A: Search for a Video")
+    flow_b_idx = find_heading_index(index, "Flow B: Open a Video Watch Page")
     if flow_a_idx is not None and flow_b_idx is None and enum_tpl is not None:
-        elems = [make_heading_like_template(body, "Flow B: Open a Video Watch Page", 2)]
+        elems = [make_heading_like_template(index.body, "Flow B: Open a Video Watch Page", 2)]
         for item in enums.get("Flow B: Open a Video Watch Page", []):
-            elems.append(clone_list_paragraph_with_text(enum_tpl, item))
-        insert_after_index(body, flow_a_idx, elems)
+            elems.append(clone_list_paragraph_with_text(enum_tpl, item, index.prototypes))
+        insert_after_index(index, flow_a_idx, elems)
         changed += 1
 
     # Add missing Maintenance Notes section
-    maint_idx = find_heading_index(body, "Maintenance Notes")
-    ex_idx = find_heading_index(body, "Example Task Flows")
-    flow_b_idx = find_heading_index(body, "Flow B: Open a Video Watch Page")
-    flow_a_idx = find_heading_index(body, "Flow A: Search for a Video")
+    maint_idx = find_heading_index(index, "Maintenance Notes")
+    ex_idx = find_heading_index(index, "Example Task Flows")
+    flow_b_idx = find_heading_index(index, "Flow B: Open a Video Watch Page")
+    flow_a_idx = find_heading_index(index, "Flow A: Search for a Video")
     maint_anchor = flow_b_idx if flow_b_idx is not None else (flow_a_idx if flow_a_idx is not None else ex_idx)
     if maint_idx is None and maint_anchor is not None and list_tpl is not None:
-        elems = [make_heading_like_template(body, "Maintenance Notes", 1)]
+        elems = [make_heading_like_template(index.body, "Maintenance Notes", 1)]
         for item in lists.get("Maintenance Notes", []):
-            elems.append(clone_list_paragraph_with_text(list_tpl, item))
-        insert_after_index(body, maint_anchor, elems)
+            elems.append(clone_list_paragraph_with_text(list_tpl, item, index.prototypes))
+        insert_after_index(index, maint_anchor, elems)
         changed += 1
 
     # Add missing Build section
-    build_idx = find_heading_index(body, "Build")
-    maint_idx = find_heading_index(body, "Maintenance Notes")
+    build_idx = find_heading_index(index, "Build")
+    maint_idx = find_heading_index(index, "Maintenance Notes")
     if build_idx is None:
         anchor = maint_idx if maint_idx is not None else maint_anchor
         if anchor is not None:
-            p = ET.Element(w("p"))
+            p = w_el("p")
             set_paragraph_text(p, "Run this command in the same directory: latexmk -pdf main.tex")
-            insert_after_index(body, anchor, [make_heading_like_template(body, "Build", 1), p])
+            insert_after_index(index, anchor, [make_heading_like_template(index.body, "Build", 1), p])
             changed += 1
 
     return changed
 
 
-def rebuild_links_tables(body: ET.Element, tables: dict[str, list[list[str]]]) -> int:
+def rebuild_links_tables(index: BodyIndex, tables: dict[str, TableModel]) -> int:
     changed = 0
-    links_idx = find_heading_index(body, "Links and Buttons Mapping")
-    example_idx = find_heading_index(body, "Example Task Flows")
+    links_idx = find_heading_index(index, "Links and Buttons Mapping")
+    example_idx = find_heading_index(index, "Example Task Flows")
     if links_idx is None or example_idx is None:
         return 0
 
-    children = list(body)
+    children = index.children
     template_tbl = None
     # Prefer a table already in this section as template.
     for el in children[links_idx + 1 : example_idx]:
-        if el.tag == w("tbl"):
+        if el.tag == W_TBL:
             template_tbl = el
             break
     # Fallback to first table in doc.
     if template_tbl is None:
         for el in children:
-            if el.tag == w("tbl"):
+            if el.tag == W_TBL:
                 template_tbl = el
                 break
     if template_tbl is None:
         return 0
 
     # Remove all current tables in this section.
-    for el in children[links_idx + 1 : example_idx]:
-        if el.tag == w("tbl"):
-            body.remove(el)
+    editor = BodyEditor(index)
+    for j in range(links_idx + 1, example_idx):
+        if children[j].tag == W_TBL:
+            editor.remove(j)
             changed += 1
 
     specs = [
-        ("Top Navigation", ["Control", "Type", "Function"], tables.get("Top Navigation", [])),
-        ("Left Navigation (Common Signed-out Items)", ["Item", "Type", "Function"], tables.get("Left Navigation (Common Signed-out Items)", [])),
-        ("Home Feed Video Card", ["Area", "Type", "Function"], tables.get("Home Feed Video Card", [])),
+        ("Top Navigation", ["Control", "Type", "Function"], tables.get("Top Navigation", TableModel())),
+        ("Left Navigation (Common Signed-out Items)", ["Item", "Type", "Function"], tables.get("Left Navigation (Common Signed-out Items)", TableModel())),
+        ("Home Feed Video Card", ["Area", "Type", "Function"], tables.get("Home Feed Video Card", TableModel())),
     ]
 
-    # Insert in reverse to preserve heading indexes.
-    for heading, headers, rows in reversed(specs):
-        hi = find_heading_index(body, heading)
+    # Positions refer to the snapshot, so headings keep their indexes until apply().
+    for heading, headers, rows in specs:
+        hi = find_heading_index(index, heading)
         if hi is None:
             continue
-        tbl = build_table_with_header(template_tbl, headers, rows)
-        body.insert(hi + 1, tbl)
+        editor.insert_after(hi, [build_table_with_header(template_tbl, headers, rows)])
         changed += 1
+    editor.apply()
 
     return changed
 
 
+def copy_zip_entry(zin: zipfile.ZipFile, zout: zipfile.ZipFile, item: zipfile.ZipInfo) -> None:
+    # Untouched parts are streamed across; media that is already compressed is
+    # stored rather than deflated a second time.
+    info = copy.copy(item)
+    if info.filename.lower().endswith(_PRECOMPRESSED_SUFFIXES):
+        info.compress_type = zipfile.ZIP_STORED
+    with zin.open(item) as src, zout.open(info, "w") as dst:
+        shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+
 def write_docx_with_updated_document_xml(
     src_docx: Path,
     out_docx: Path,
     new_doc_xml: bytes,
     new_numbering_xml: bytes | None = None,
 ) -> None:
-    with zipfile.ZipFile(src_docx, "r") as zin:
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp_path = Path(tmp.name)
-        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zout:
+    # Build the archive in a sibling temp file and swap it in atomically once it is
+    # complete, so a failed repack never clobbers the source or a previous output.
+    target = out_docx.with_suffix(out_docx.suffix + ".tmp")
+    try:
+        with zipfile.ZipFile(src_docx, "r") as zin, zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zout:
             for item in zin.infolist():
-                data = zin.read(item.filename)
                 if item.filename == "word/document.xml":
-                    data = new_doc_xml
+                    zout.writestr(item, new_doc_xml)
                 elif item.filename == "word/numbering.xml" and new_numbering_xml is not None:
-                    data = new_numbering_xml
-                zout.writestr(item, data)
-    out_docx.write_bytes(tmp_path.read_bytes())
-    tmp_path.unlink(missing_ok=True)
-
-
-def remove_docx_paragraph(paragraph: Paragraph) -> None:
-    p = paragraph._element
-    parent = p.getparent()
-    if parent is not None:
-        parent.remove(p)
-
-
-def insert_paragraph_after_docx(paragraph: Paragraph, text: str | None = None, style: str | None = None) -> Paragraph:
-    new_p = OxmlElement("w:p")
-    paragraph._p.addnext(new_p)
-    p = Paragraph(new_p, paragraph._parent)
-    if style:
-        try:
-            p.style = style
-        except Exception:
-            pass
-    if text is not None:
-        p.add_run(text)
-    return p
+                    zout.writestr(item, new_numbering_xml)
+                else:
+                    copy_zip_entry(zin, zout, item)
+    except BaseException:
+        target.unlink(missing_ok=True)
+        raise
+    os.replace(target, out_docx)
+
+
+def build_spec_table(cols: list[Any], rows: list[Any], width: int) -> Any:
+    """Header plus body rows laid out as doc.add_table/add_row would, parsed in one go."""
+    ncols = len(cols)
+    col_twips = Emu(width // ncols).twips
+    tc = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_twips}"/></w:tcPr><w:p><w:r/></w:p></w:tc>'
+    grid = f'<w:gridCol w:w="{col_twips}"/>' * ncols
+    tbl = parse_oxml(
+        f'<w:tbl xmlns:w="{NS_W}"><w:tblPr><w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+        ' w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+        f"<w:tblGrid>{grid}</w:tblGrid>{f'<w:tr>{tc * ncols}</w:tr>' * (len(rows) + 1)}</w:tbl>"
+    )
+    texts = [str(c) for c in cols]
+    for row in rows:
+        texts.extend(str(row[idx] if idx < len(row) else "") for idx in range(ncols))
+    # CT_R.text is what _Cell.text ends up calling, so tabs/breaks come out the same.
+    for r, text in zip(_TBL_CELL_RUN_XP(tbl), texts):
+        r.text = text
+    return tbl
 
 
 def max_attr_int(elements: list[Any], attr_name: str, default: int) -> int:
     vals: list[int] = []
     for el in elements:
-        v = el.get(qn(attr_name), "")
+        v = el.get(attr_name, "")
         if v.isdigit():
             vals.append(int(v))
     return max(vals) if vals else default
 
 
-def ensure_num_id_for_format(doc: Document, num_fmt: str, restart: bool = False) -> str:
-    numbering = doc.part.numbering_part.element
-    abstract_nums = list(numbering.findall(qn("w:abstractNum")))
-    nums = list(numbering.findall(qn("w:num")))
-
-    abstract_meta: dict[str, dict[str, str]] = {}
-    for absn in abstract_nums:
-        aid = absn.get(qn("w:abstractNumId"), "")
-        lvl0 = None
-        for lvl in absn.findall(qn("w:lvl")):
-            if lvl.get(qn("w:ilvl"), "") == "0":
-                lvl0 = lvl
-                break
-        if aid and lvl0 is not None:
-            fmt = lvl0.find(qn("w:numFmt"))
-            lvl_text = lvl0.find(qn("w:lvlText"))
-            if fmt is not None:
-                abstract_meta[aid] = {
-                    "fmt": fmt.get(qn("w:val"), ""),
-                    "lvl_text": (lvl_text.get(qn("w:val"), "") if lvl_text is not None else ""),
-                }
-
-    target_abs_id = ""
-    for aid, meta in abstract_meta.items():
-        if meta.get("fmt") != num_fmt:
-            continue
-        if num_fmt == "bullet":
-            # Some generators produce blank bullet glyph definitions (invisible markers).
-            # Only reuse bullet definitions with a visible lvlText.
-            if not meta.get("lvl_text", "").strip():
-                continue
-        target_abs_id = aid
-        break
-
-    if not target_abs_id:
-        new_abs_id = str(max_attr_int(abstract_nums, "w:abstractNumId", 1999) + 1)
-        absn = OxmlElement("w:abstractNum")
-        absn.set(qn("w:abstractNumId"), new_abs_id)
-
-        mlt = OxmlElement("w:multiLevelType")
-        mlt.set(qn("w:val"), "singleLevel")
-        absn.append(mlt)
-
-        lvl = OxmlElement("w:lvl")
-        lvl.set(qn("w:ilvl"), "0")
-        start = OxmlElement("w:start")
-        start.set(qn("w:val"), "1")
-        lvl.append(start)
-        fmt = OxmlElement("w:numFmt")
-        fmt.set(qn("w:val"), num_fmt)
-        lvl.append(fmt)
-        lvl_text = OxmlElement("w:lvlText")
-        lvl_text.set(qn("w:val"), "%1." if num_fmt == "decimal" else "•")
-        lvl.append(lvl_text)
-        if num_fmt == "bullet":
-            rpr = OxmlElement("w:rPr")
-            rfonts = OxmlElement("w:rFonts")
-            rfonts.set(qn("w:ascii"), "Symbol")
-            rfonts.set(qn("w:hAnsi"), "Symbol")
-            rpr.append(rfonts)
-            lvl.append(rpr)
-        lvl_jc = OxmlElement("w:lvlJc")
-        lvl_jc.set(qn("w:val"), "left")
-        lvl.append(lvl_jc)
-
-        ppr = OxmlElement("w:pPr")
-        ind = OxmlElement("w:ind")
-        ind.set(qn("w:left"), "720")
-        ind.set(qn("w:hanging"), "360")
-        ppr.append(ind)
-        lvl.append(ppr)
-        absn.append(lvl)
-        numbering.append(absn)
-        target_abs_id = new_abs_id
-        nums = list(numbering.findall(qn("w:num")))
-
-    if not restart:
+class NumberingIndex:
+    """numbering.xml ids scanned once; the num helpers below keep it current."""
+
+    def __init__(self, numbering: Any) -> None:
+        self.numbering = numbering
+        abstract_nums = _ABSTRACT_NUM_XP(numbering)
+        nums = _NUM_XP(numbering)
+
+        abstract_meta: dict[str, dict[str, str]] = {}
+        for absn in abstract_nums:
+            aid = absn.get(W_ABSTRACT_NUM_ID, "")
+            lvl0 = _LVL0_XP(absn)
+            if aid and lvl0:
+                fmt = _NUM_FMT_XP(lvl0[0])
+                lvl_text = _LVL_TEXT_XP(lvl0[0])
+                if fmt:
+                    abstract_meta[aid] = {
+                        "fmt": fmt[0].get(W_VAL, ""),
+                        "lvl_text": (lvl_text[0].get(W_VAL, "") if lvl_text else ""),
+                    }
+
+        # First reusable abstractNum per format, in document order.
+        self.abs_by_fmt: dict[str, str] = {}
+        for aid, meta in abstract_meta.items():
+            fmt = meta.get("fmt", "")
+            if fmt == "bullet":
+                # Some generators produce blank bullet glyph definitions (invisible markers).
+                # Only reuse bullet definitions with a visible lvlText.
+                if not meta.get("lvl_text", "").strip():
+                    continue
+            self.abs_by_fmt.setdefault(fmt, aid)
+
+        # First numId referencing each abstractNum, in document order.
+        self.num_by_abs: dict[str, str] = {}
         for num in nums:
-            nid = num.get(qn("w:numId"), "")
-            absid = num.find(qn("w:abstractNumId"))
-            if nid and absid is not None and absid.get(qn("w:val"), "") == target_abs_id:
-                return nid
-
-    new_num_id = str(max_attr_int(nums, "w:numId", 999) + 1)
+            nid = num.get(W_NUM_ID, "")
+            absid = _ABSTRACT_NUM_ID_XP(num)
+            if nid and absid:
+                self.num_by_abs.setdefault(absid[0].get(W_VAL, ""), nid)
+
+        self.max_abs_id = max_attr_int(abstract_nums, W_ABSTRACT_NUM_ID, 1999)
+        self.max_num_id = max_attr_int(nums, W_NUM_ID, 999)
+
+
+def abstract_num_id_for(index: NumberingIndex, num_fmt: str) -> str:
+    """Reusable abstractNum for num_fmt, appending a single-level one if none exists."""
+    aid = index.abs_by_fmt.get(num_fmt, "")
+    if aid:
+        return aid
+    index.max_abs_id += 1
+    new_abs_id = str(index.max_abs_id)
+    absn = OxmlElement("w:abstractNum")
+    absn.set(W_ABSTRACT_NUM_ID, new_abs_id)
+
+    mlt = OxmlElement("w:multiLevelType")
+    mlt.set(W_VAL, "singleLevel")
+    absn.append(mlt)
+
+    lvl = OxmlElement("w:lvl")
+    lvl.set(W_ILVL, "0")
+    start = OxmlElement("w:start")
+    start.set(W_VAL, "1")
+    lvl.append(start)
+    fmt = OxmlElement("w:numFmt")
+    fmt.set(W_VAL, num_fmt)
+    lvl.append(fmt)
+    lvl_text = OxmlElement("w:lvlText")
+    lvl_text.set(W_VAL, "%1." if num_fmt == "decimal" else "•")
+    lvl.append(lvl_text)
+    if num_fmt == "bullet":
+        rpr = OxmlElement("w:rPr")
+        rfonts = OxmlElement("w:rFonts")
+        rfonts.set(W_ASCII, "Symbol")
+        rfonts.set(W_HANSI, "Symbol")
+        rpr.append(rfonts)
+        lvl.append(rpr)
+    lvl_jc = OxmlElement("w:lvlJc")
+    lvl_jc.set(W_VAL, "left")
+    lvl.append(lvl_jc)
+
+    ppr = OxmlElement("w:pPr")
+    ind = OxmlElement("w:ind")
+    ind.set(W_LEFT, "720")
+    ind.set(W_HANGING, "360")
+    ppr.append(ind)
+    lvl.append(ppr)
+    absn.append(lvl)
+    index.numbering.append(absn)
+    index.abs_by_fmt[num_fmt] = new_abs_id
+    return new_abs_id
+
+
+def append_num(index: NumberingIndex, abs_id: str, restart: bool = False) -> str:
+    index.max_num_id += 1
+    new_num_id = str(index.max_num_id)
     num = OxmlElement("w:num")
-    num.set(qn("w:numId"), new_num_id)
+    num.set(W_NUM_ID, new_num_id)
     absid = OxmlElement("w:abstractNumId")
-    absid.set(qn("w:val"), target_abs_id)
+    absid.set(W_VAL, abs_id)
     num.append(absid)
 
-    if restart and num_fmt == "decimal":
+    if restart:
         lvl_ovr = OxmlElement("w:lvlOverride")
-        lvl_ovr.set(qn("w:ilvl"), "0")
+        lvl_ovr.set(W_ILVL, "0")
         start_ovr = OxmlElement("w:startOverride")
-        start_ovr.set(qn("w:val"), "1")
+        start_ovr.set(W_VAL, "1")
         lvl_ovr.append(start_ovr)
         num.append(lvl_ovr)
 
-    numbering.append(num)
+    index.numbering.append(num)
+    index.num_by_abs.setdefault(abs_id, new_num_id)
     return new_num_id
 
 
-def set_paragraph_numpr(paragraph: Paragraph, num_id: str) -> None:
-    ppr = paragraph._p.get_or_add_pPr()
-    for child in list(ppr):
-        if child.tag == qn("w:numPr"):
-            ppr.remove(child)
+def ensure_bullet_num_id(index: NumberingIndex) -> str:
+    abs_id = abstract_num_id_for(index, "bullet")
+    if abs_id in index.num_by_abs:
+        return index.num_by_abs[abs_id]
+    return append_num(index, abs_id)
+
 
+def new_decimal_num_id(index: NumberingIndex) -> str:
+    # A fresh numId with a start override per ordered block so each restarts at 1.
+    return append_num(index, abstract_num_id_for(index, "decimal"), restart=True)
+
+
+@lru_cache(maxsize=64)
+def numpr_prototype(num_id: str) -> Any:
+    # Shared; callers insert a deepcopy.
     numpr = OxmlElement("w:numPr")
     ilvl = OxmlElement("w:ilvl")
-    ilvl.set(qn("w:val"), "0")
+    ilvl.set(W_VAL, "0")
     numid = OxmlElement("w:numId")
-    numid.set(qn("w:val"), str(num_id))
+    numid.set(W_VAL, num_id)
     numpr.append(ilvl)
     numpr.append(numid)
-    ppr.append(numpr)
+    return numpr
+
+
+def set_paragraph_numpr(paragraph: Paragraph, num_id: str) -> None:
+    ppr = paragraph._p.get_or_add_pPr()
+    for existing in _NUMPR_CHILD_XP(ppr):
+        ppr.remove(existing)
+    ppr.append(copy.deepcopy(numpr_prototype(str(num_id))))
+
+
+@dataclass
+class SpecSyncState:
+    """Per-run handles the block writers share."""
+
+    doc: Any
+    num_index: NumberingIndex
+    bullet_num_id: str
+
+
+# Block writers replace a token paragraph with a spec block and return
+# (changes, skipped_blocks).
+def write_paragraph_block(p: Paragraph, block: dict, state: SpecSyncState) -> tuple[int, int]:
+    p.text = block.get("text", "")
+    return 1, 0
+
+
+def write_list_items(p: Paragraph, items: list[Any], num_id: str, state: SpecSyncState) -> int:
+    p.text = items[0]
+    set_paragraph_numpr(p, num_id)
+
+    # Remaining items are copies of one numbered shell, chained in after p.
+    shell = OxmlElement("w:p")
+    set_paragraph_numpr(Paragraph(shell, state.doc), num_id)
+    anchor = p._p
+    for item in items[1:]:
+        new_p = copy.deepcopy(shell)
+        r = new_p.add_r()
+        if item:
+            r.text = item
+        anchor.addnext(new_p)
+        anchor = new_p
+    return len(items)
+
+
+def write_bullet_list_block(p: Paragraph, block: dict, state: SpecSyncState) -> tuple[int, int]:
+    items = list(block.get("items", []))
+    if not items:
+        p.text = ""
+        return 1, 0
+    return write_list_items(p, items, state.bullet_num_id, state), 0
+
+
+def write_numbered_list_block(p: Paragraph, block: dict, state: SpecSyncState) -> tuple[int, int]:
+    items = list(block.get("items", []))
+    if not items:
+        p.text = ""
+        return 1, 0
+    return write_list_items(p, items, new_decimal_num_id(state.num_index), state), 0
+
+
+def write_table_block(p: Paragraph, block: dict, state: SpecSyncState) -> tuple[int, int]:
+    cols = list(block.get("columns", []))
+    rows = list(block.get("rows", []))
+    if not cols:
+        cols = ["Column 1", "Column 2", "Column 3"]
+    tbl = build_spec_table(cols, rows, state.doc._block_width)
+    # The token paragraph becomes the table in a single tree edit.
+    p._p.getparent().replace(p._p, tbl)
+    return 1, 0
+
+
+def write_figure_block(p: Paragraph, block: dict, state: SpecSyncState) -> tuple[int, int]:
+    # Figure image/caption placement is handled by sync_latex_images_to_docx.py.
+    p.text = ""
+    return 1, 0
+
+
+def write_unknown_block(p: Paragraph, block: dict, state: SpecSyncState) -> tuple[int, int]:
+    p.text = ""
+    return 1, 1
+
+
+_BLOCK_WRITERS = {
+    "paragraph": write_paragraph_block,
+    "bullet_list": write_bullet_list_block,
+    "numbered_list": write_numbered_list_block,
+    "table": write_table_block,
+    "figure": write_figure_block,
+}
 
 
 def sync_dynamic_from_spec(args: argparse.Namespace) -> int:
     if args.spec is None:
         return 1
-    if Document is None or OxmlElement is None or qn is None:
+    if Document is None or OxmlElement is None or parse_oxml is None:
         raise SystemExit("python-docx is required for --spec dynamic sync mode")
 
-    spec = json.loads(args.spec.read_text(encoding="utf-8"))
-    block_map: dict[str, dict] = {}
-    for section in spec.get("sections", []):
-        for block in section.get("blocks", []):
-            bid = block.get("block_id")
-            if bid:
-                block_map[bid] = block
-
-    block_token_re = re.compile(r"(?:\[\[)?MANUAL_BLOCK:([A-Za-z0-9_.:-]+)(?:\]\])?")
-    fig_token_re = re.compile(r"(?:\[\[)?MANUAL_FIG:([A-Za-z0-9_.:-]+)(?:\]\])?")
+    if orjson is not None:
+        spec = orjson.loads(args.spec.read_bytes())
+    else:
+        spec = json.loads(args.spec.read_text(encoding="utf-8"))
+    block_map: dict[str, dict] = {
+        bid: block
+        for section in spec.get("sections", ())
+        for block in section.get("blocks", ())
+        if (bid := block.get("block_id"))
+    }
 
     doc = Document(str(args.docx))
-    bullet_num_id = ensure_num_id_for_format(doc, "bullet", restart=False)
+    # The numbering part is looked up once; every list block appends to it.
+    numbering_el = doc.part.numbering_part.element
+    num_index = NumberingIndex(numbering_el)
+    state = SpecSyncState(doc, num_index, ensure_bullet_num_id(num_index))
     changes = 0
     skipped = 0
 
-    for p in list(doc.paragraphs):
-        text = (p.text or "").strip()
-        if fig_token_re.fullmatch(text):
+    # Top-level paragraphs only, like doc.paragraphs; one pass resolves tokens
+    # and clears any leftover markers. Text comes straight from the w:t nodes and
+    # the Paragraph wrapper is only built for paragraphs that get rewritten.
+    for p_el in doc.element.body.findall(W_P):
+        text = paragraph_text(p_el)
+        # Almost no paragraph carries a marker; skip the regexes for those.
+        if "MANUAL_" not in text:
             continue
-        m = block_token_re.fullmatch(text)
-        if not m:
+        m = _TOKEN_RE.fullmatch(text)
+        if m is None:
+            # Unresolved block tokens are cleared to avoid leaking control markers.
+            if _BLOCK_TOKEN_RE.search(text):
+                Paragraph(p_el, doc).text = ""
+                changes += 1
             continue
+        if m.group("kind") == "FIG":
+            continue
+        p = Paragraph(p_el, doc)
 
-        block_id = m.group(1).strip()
+        block_id = m.group("id").strip()
         block = block_map.get(block_id)
         if not block:
             p.text = ""
@@ -1047,69 +1438,10 @@ def sync_dynamic_from_spec(args: argparse.Namespace) -> int:
             continue
 
         btype = block.get("type")
-        if btype == "paragraph":
-            p.text = block.get("text", "")
-            changes += 1
-            continue
-
-        if btype in ("bullet_list", "numbered_list"):
-            items = list(block.get("items", []))
-            if not items:
-                p.text = ""
-                changes += 1
-                continue
-            num_id = bullet_num_id
-            if btype == "numbered_list":
-                # New numId per ordered block to force restart at 1.
-                num_id = ensure_num_id_for_format(doc, "decimal", restart=True)
-
-            p.text = items[0]
-            set_paragraph_numpr(p, num_id)
-
-            tail = p
-            for item in items[1:]:
-                tail = insert_paragraph_after_docx(
-                    tail,
-                    item,
-                )
-                set_paragraph_numpr(tail, num_id)
-                changes += 1
-            changes += 1
-            continue
-
-        if btype == "table":
-            cols = list(block.get("columns", []))
-            rows = list(block.get("rows", []))
-            if not cols:
-                cols = ["Column 1", "Column 2", "Column 3"]
-            table = doc.add_table(rows=1, cols=len(cols))
-            for idx, c in enumerate(cols):
-                table.rows[0].cells[idx].text = str(c)
-            for row in rows:
-                r = table.add_row().cells
-                for idx, c in enumerate(cols):
-                    r[idx].text = str(row[idx] if idx < len(row) else "")
-            p._p.addnext(table._tbl)
-            remove_docx_paragraph(p)
-            changes += 1
-            continue
-
-        if btype == "figure":
-            # Figure image/caption placement is handled by sync_latex_images_to_docx.py.
-            p.text = ""
-            changes += 1
-            continue
-
-        p.text = ""
-        skipped += 1
-        changes += 1
-
-    # Cleanup unresolved block tokens to avoid leaking control markers.
-    for p in doc.paragraphs:
-        t = (p.text or "").strip()
-        if block_token_re.search(t):
-            p.text = ""
-            changes += 1
+        writer = _BLOCK_WRITERS.get(btype) if isinstance(btype, str) else None
+        dc, ds = (writer or write_unknown_block)(p, block, state)
+        changes += dc
+        skipped += ds
 
     out_docx = args.out if args.out else args.docx
     print(f"docx: {args.docx}")
@@ -1128,39 +1460,47 @@ def legacy_main(args: argparse.Namespace) -> int:
     out_docx = args.out if args.out else args.docx
 
     lists, tables, enums, build_lines = parse_tex(args.tex)
-    flow_a_num_id, flow_b_num_id, new_numbering_xml = prepare_decimal_num_ids(args.docx)
+    # The num ids only feed the numbered Flow lists.
+    if any(enums.values()):
+        flow_a_num_id, flow_b_num_id, new_numbering_xml = prepare_decimal_num_ids(args.docx)
+    else:
+        flow_a_num_id = flow_b_num_id = DEFAULT_NUM_ID
+        new_numbering_xml = None
 
     with zipfile.ZipFile(args.docx, "r") as zf:
         doc_xml = zf.read("word/document.xml")
-    root = ET.fromstring(doc_xml)
+    root = parse_xml(doc_xml)
     body = root.find("w:body", NS)
     if body is None:
         raise SystemExit("DOCX body not found")
 
+    # One heading index serves every pass; it is rebuilt only after the body's
+    # children change.
+    index = BodyIndex(body)
     changed = 0
-    changed += sync_list_under_heading(body, "Scope", lists.get("Scope", []))
-    changed += sync_list_under_heading(body, "Prerequisites", lists.get("Prerequisites", []))
-    changed += sync_list_under_heading(body, "Maintenance Notes", lists.get("Maintenance Notes", []))
+    changed += sync_list_under_heading(index, "Scope", lists.get("Scope", []))
+    changed += sync_list_under_heading(index, "Prerequisites", lists.get("Prerequisites", []))
+    changed += sync_list_under_heading(index, "Maintenance Notes", lists.get("Maintenance Notes", []))
 
-    changed += sync_table_under_heading(body, "Top Navigation", tables.get("Top Navigation", []))
-    changed += sync_table_under_heading(body, "Left Navigation (Common Signed-out Items)", tables.get("Left Navigation (Common Signed-out Items)", []))
-    changed += sync_table_under_heading(body, "Home Feed Video Card", tables.get("Home Feed Video Card", []))
+    changed += sync_table_under_heading(index, "Top Navigation", tables.get("Top Navigation", TableModel()))
+    changed += sync_table_under_heading(index, "Left Navigation (Common Signed-out Items)", tables.get("Left Navigation (Common Signed-out Items)", TableModel()))
+    changed += sync_table_under_heading(index, "Home Feed Video Card", tables.get("Home Feed Video Card", TableModel()))
 
-    changed += sync_list_under_heading(body, "Flow A: Search for a Video", enums.get("Flow A: Search for a Video", []))
-    changed += sync_list_under_heading(body, "Flow B: Open a Video Watch Page", enums.get("Flow B: Open a Video Watch Page", []))
+    changed += sync_list_under_heading(index, "Flow A: Search for a Video", enums.get("Flow A: Search for a Video", []))
+    changed += sync_list_under_heading(index, "Flow B: Open a Video Watch Page", enums.get("Flow B: Open a Video Watch Page", []))
 
-    changed += ensure_missing_blocks(body, lists, tables, enums)
-    changed += rebuild_links_tables(body, tables)
+    changed += ensure_missing_blocks(index, lists, tables, enums)
+    changed += rebuild_links_tables(index, tables)
     changed += enforce_section_lists_and_build(
-        body,
+        index,
         lists,
         enums,
         build_lines,
         flow_a_num_id,
         flow_b_num_id,
     )
-    changed += normalize_heading_manual_numbers(body)
-    changed += enforce_heading_numbers(body)
+    changed += normalize_heading_manual_numbers(index)
+    changed += enforce_heading_numbers(index)
 
     print(f"docx: {args.docx}")
     print(f"tex: {args.tex}")
@@ -1168,7 +1508,7 @@ def legacy_main(args: argparse.Namespace) -> int:
     print(f"changes: {changed}")
 
     if not args.dry_run and changed > 0:
-        new_xml = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+        new_xml = serialize_xml(root)
         write_docx_with_updated_document_xml(args.docx, out_docx, new_xml, new_numbering_xml)
         print("updated docx")
 
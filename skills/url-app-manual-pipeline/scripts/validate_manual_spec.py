@@ -4,8 +4,10 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
+from typing import Any, Iterable
 
 ALLOWED_TYPES = {"paragraph", "bullet_list", "numbered_list", "table", "figure"}
+_FIGURE_KEYS = ("figure_id", "caption", "image_rel", "anchor_section_id", "order")
 
 
 def parse_args() -> argparse.Namespace:
@@ -18,64 +20,84 @@ def fail(msg: str) -> None:
     raise SystemExit(f"invalid spec: {msg}")
 
 
-def main() -> int:
-    args = parse_args()
-    spec = json.loads(args.spec.read_text(encoding="utf-8"))
-
-    meta = spec.get("meta")
+def check_meta(meta: Any) -> None:
     if not isinstance(meta, dict):
         fail("meta missing")
     for key in ("spec_version", "locale", "url", "host", "generated_at", "generator_mode"):
         if not meta.get(key):
             fail(f"meta.{key} missing")
 
-    sections = spec.get("sections")
-    if not isinstance(sections, list) or not sections:
-        fail("sections missing or empty")
 
+def check_block(block: dict, section_id: Any, block_ids: set[str]) -> None:
+    bid = block.get("block_id")
+    btype = block.get("type")
+    if not bid:
+        fail(f"block_id missing in section {section_id}")
+    if bid in block_ids:
+        fail(f"duplicate block_id: {bid}")
+    block_ids.add(bid)
+    if btype not in ALLOWED_TYPES:
+        fail(f"unsupported block type: {btype}")
+    if btype in ("bullet_list", "numbered_list") and not isinstance(block.get("items"), list):
+        fail(f"{bid} list block missing items")
+    if btype == "table":
+        if not isinstance(block.get("columns"), list) or not isinstance(block.get("rows"), list):
+            fail(f"{bid} table block missing columns/rows")
+    if btype == "figure":
+        missing = [key for key in _FIGURE_KEYS if block.get(key) in (None, "")]
+        if missing:
+            fail(f"{bid} figure missing {', '.join(missing)}")
+
+
+def check_sections(sections: Iterable[dict]) -> tuple[int, int]:
+    """Returns (section count, block count)."""
     block_ids: set[str] = set()
-    expected_order = 1
-    for section in sorted(sections, key=lambda s: s.get("order", 9999)):
-        if section.get("order") != expected_order:
-            fail(f"section order not contiguous at {section.get('section_id')}")
-        expected_order += 1
-        if not section.get("section_id"):
+    orders: list[tuple[Any, Any, Any]] = []
+    for section in sections:
+        section_id = section.get("section_id")
+        orders.append((section.get("order", 9999), section.get("order"), section_id))
+        if not section_id:
             fail("section_id missing")
         if not section.get("title"):
-            fail(f"title missing for section {section.get('section_id')}")
+            fail(f"title missing for section {section_id}")
         blocks = section.get("blocks")
         if not isinstance(blocks, list):
-            fail(f"blocks missing for section {section.get('section_id')}")
+            fail(f"blocks missing for section {section_id}")
         for block in blocks:
-            bid = block.get("block_id")
-            btype = block.get("type")
-            if not bid:
-                fail(f"block_id missing in section {section.get('section_id')}")
-            if bid in block_ids:
-                fail(f"duplicate block_id: {bid}")
-            block_ids.add(bid)
-            if btype not in ALLOWED_TYPES:
-                fail(f"unsupported block type: {btype}")
-            if btype in ("bullet_list", "numbered_list") and not isinstance(block.get("items"), list):
-                fail(f"{bid} list block missing items")
-            if btype == "table":
-                if not isinstance(block.get("columns"), list) or not isinstance(block.get("rows"), list):
-                    fail(f"{bid} table block missing columns/rows")
-            if btype == "figure":
-                for key in ("figure_id", "caption", "image_rel", "anchor_section_id", "order"):
-                    if block.get(key) in (None, ""):
-                        fail(f"{bid} figure missing {key}")
-
-    trace = spec.get("trace")
+            check_block(block, section_id, block_ids)
+
+    if not orders:
+        fail("sections missing or empty")
+    # Orders must be exactly 1..N in any arrangement; only a broken spec pays
+    # for the sort that names the first section out of place.
+    seen = {order for _, order, _ in orders}
+    if len(seen) != len(orders) or seen != set(range(1, len(orders) + 1)):
+        orders.sort(key=lambda o: o[0])
+        for expected_order, (_, order, section_id) in enumerate(orders, start=1):
+            if order != expected_order:
+                fail(f"section order not contiguous at {section_id}")
+    return len(orders), len(block_ids)
+
+
+def check_trace(trace: Any) -> None:
     if not isinstance(trace, dict):
         fail("trace missing")
     for key in ("rules_used", "llm_rewrite_applied", "fallbacks"):
         if key not in trace:
             fail(f"trace.{key} missing")
 
+
+def main() -> int:
+    args = parse_args()
+    spec = json.loads(args.spec.read_text(encoding="utf-8"))
+    check_meta(spec.get("meta"))
+    sections = spec.get("sections")
+    n_sections, n_blocks = check_sections(sections if isinstance(sections, list) else ())
+    check_trace(spec.get("trace"))
+
     print(f"valid spec: {args.spec}")
-    print(f"sections: {len(sections)}")
-    print(f"blocks: {len(block_ids)}")
+    print(f"sections: {n_sections}")
+    print(f"blocks: {n_blocks}")
     return 0
 
 